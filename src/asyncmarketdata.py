@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import time
+from marketdata import MarketData
+
+
+PRICE_FIELDS = ['bestBuyYesCost', 'bestBuyNoCost', 'bestSellYesCost', 'bestSellNoCost', 'lastTradePrice']
+
+
+class AsyncMarketData(MarketData):
+    '''
+    MarketData that is kept up to date in the background. A snapshot of the
+    last API response is loaded from disk right away, so poll checking can
+    start before the API answers, and the market is then refreshed every
+    refresh_interval seconds over a shared aiohttp session. Every refresh
+    is written back to the snapshot.
+
+    Typical usage: init() -> await start(session) -> (best_prices() / buy_bracket_selector()) -> await stop()
+
+    '''
+    def __init__(self, market_num, snapshot_path = None, refresh_interval = 5.0):
+        '''
+        Desc:
+            Loads the snapshot if there is one. Nothing is requested until
+            start() or refresh().
+
+        Params:
+            market_num (int): PredictIt number assigned to specific market.
+            snapshot_path (str): JSON file of the last API response.
+                Defaults to market_<market_num>.json.
+            refresh_interval (float): Seconds between background refreshes.
+
+        '''
+        assert isinstance(market_num, int)
+        self.market_num = market_num
+        self.snapshot_path = snapshot_path or f'market_{market_num}.json'
+        self.refresh_interval = refresh_interval
+        self.contract_key = None
+        self.market_data = None
+        self.prices = {} #contract ID -> {price field -> price}
+        self.contract_ids = []
+        self.updated_at = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.listeners = []
+        self.session = None
+        self.refresh_task = None
+        snapshot = self.read_snapshot()
+        if snapshot is not None:
+            updated_at, market_data = snapshot
+            self.update(market_data)
+            self.updated_at = updated_at
+
+    @property
+    def is_loaded(self):
+        return self.market_data is not None
+
+    @property
+    def age(self):
+        '''
+        Desc:
+            Seconds since the loaded data was retrieved. None if nothing
+            is loaded.
+
+        '''
+        if self.updated_at is None:
+            return None
+        return time.time() - self.updated_at
+
+    def read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            return snapshot['updated_at'], snapshot['market_data']
+        except (ValueError, KeyError):
+            print(f'Ignoring unreadable market snapshot {self.snapshot_path}')
+            return None
+
+    def write_snapshot(self):
+        #Written aside and renamed, so a crash never leaves a partial snapshot
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'updated_at': self.updated_at, 'market_data': self.market_data}, f)
+        os.replace(temp_path, self.snapshot_path)
+
+    def add_listener(self, callback):
+        '''
+        Desc:
+            Registers callback(market, brackets_changed), called after every
+            successful refresh.
+
+        '''
+        self.listeners.append(callback)
+
+    def update(self, market_data):
+        '''
+        Desc:
+            Loads a new API response and re-reads the contract prices.
+
+        Returns:
+            brackets_changed (bool): Whether the bracket index was rebuilt.
+
+        '''
+        brackets_changed = self.load(market_data)
+        if brackets_changed:
+            self.contract_ids = self.get_contract_ids()
+        self.prices = {con['id']: {field: con.get(field) for field in PRICE_FIELDS}
+                       for con in market_data['contracts']}
+        self.updated_at = time.time()
+        return brackets_changed
+
+    async def refresh(self, session = None):
+        '''
+        Desc:
+            Retrieves the market once and saves the snapshot.
+
+        Params:
+            session (aiohttp ClientSession): Defaults to the session given
+                to start().
+
+        Returns:
+            brackets_changed (bool): Whether the bracket index was rebuilt.
+
+        '''
+        session = session or self.session
+        async with session.get(self.API_URL.format(self.market_num), timeout = 5) as response:
+            response.raise_for_status()
+            market_data = await response.json(content_type = None)
+        brackets_changed = self.update(market_data)
+        self.refreshes += 1
+        self.write_snapshot()
+        for callback in self.listeners:
+            callback(self, brackets_changed)
+        return brackets_changed
+
+    async def refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                #Expired markets raise here too, the last good data is kept
+                self.refresh_errors += 1
+                print(f'Market {self.market_num} refresh failed: {e}')
+
+    async def start(self, session):
+        '''
+        Desc:
+            Starts the background refreshes. Only waits for the API if
+            there was no snapshot to start from.
+
+        Params:
+            session (aiohttp ClientSession): Shared http session, e.g. the
+                poll checking bots' session.
+
+        '''
+        self.session = session
+        if not self.is_loaded:
+            await self.refresh()
+        self.refresh_task = asyncio.ensure_future(self.refresh_periodically())
+
+    async def stop(self):
+        if self.refresh_task is None:
+            return
+        self.refresh_task.cancel()
+        try:
+            await self.refresh_task
+        except asyncio.CancelledError:
+            pass
+        self.refresh_task = None
+
+    def best_prices(self, bracket_num):
+        '''
+        Desc:
+            Current best prices of a bracket's contract.
+
+        Params:
+            bracket_num (int): Bracket index, base 0.
+
+        Returns:
+            prices (dict): Price field -> price in dollars, e.g.
+                prices['bestBuyYesCost']. Missing prices are None.
+
+        '''
+        return self.prices[self.contract_ids[bracket_num]]
+
+    def describe(self):
+        age = None if self.age is None else round(self.age, 1)
+        return (f'Market: {self.market_num}\t Contracts: {len(self.contract_ids)}\t Age: {age} s\t '
+                f'Refreshes: {self.refreshes}\t Errors: {self.refresh_errors}')
@@ -0,0 +1,108 @@
+'''
+End-to-end detection latency benchmark against a local StandInServer.
+
+Sweeps bot counts and scheduling settings. For every setting, the poll
+value is changed at a random moment while PollChecker is checking, and the
+time from the change to detection is measured along with the requests
+spent per detection.
+
+Usage: python bench_detection.py [--pollster fte|rcp] [--trials 10]
+                                 [--latency 0.02] [--spread 0.02] [--error-rate 0.0]
+                                 [--stall-rate 0.0] [--hedge 95]
+
+'''
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from standinserver import StandInServer
+from marketdata import MarketData
+from pollchecker import PollChecker
+
+
+BOT_COUNTS = [1, 2, 4, 8]
+#(request_rate, jitter). A rate of None lets the bots fire as fast as they can.
+SCHEDULES = [(None, 0.0), (50, 0.0), (50, 0.5), (200, 0.0)]
+ALTERNATE_VALUES = {
+    'fte': [43.1234, 44.2234],
+    'rcp': [('Biden', 4.5), ('Biden', 6.5)],
+}
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(len(ordered) * percent / 100)))]
+
+
+def checks_per_bot(checker):
+    return dict(checker.metrics.counters.get('checks', {}))
+
+
+async def run_trial(checker, server, new_value, wait):
+    started = time.time()
+    requests_before = server.poll_requests
+    checks_before = checks_per_bot(checker)
+    detection = asyncio.ensure_future(checker.detect_change())
+    #Every bot must have seen the reference value before it changes
+    while True:
+        checks = checks_per_bot(checker)
+        if (len(checks) == checker.num_bots) and all(checks[bot] > checks_before.get(bot, 0) for bot in checks):
+            break
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(wait)
+    changed_at = time.time()
+    server.schedule_value(new_value, changed_at)
+    await detection
+    return checker.detected_at - changed_at, server.poll_requests - requests_before, checker.detected_at - started
+
+
+async def run_setting(server, market, num_bots, request_rate, jitter, trials, hedge_percentile = None):
+    checker = PollChecker(server.market_num, num_bots = num_bots, request_rate = request_rate, jitter = jitter,
+                          market = market, use_proxy = False, hedge_percentile = hedge_percentile)
+    checker.RCP_URL = server.rcp_url
+    checker.FTE_URL = server.fte_url
+    values = ALTERNATE_VALUES[server.pollster]
+    latencies = []
+    requests = []
+    durations = []
+    for trial in range(trials):
+        new_value = values[1] if server.current_value() == values[0] else values[0]
+        latency, spent, duration = await run_trial(checker, server, new_value, random.uniform(0.0, 0.2))
+        latencies.append(latency)
+        requests.append(spent)
+        durations.append(duration)
+    rate = 'max' if request_rate is None else f'{request_rate}/s'
+    print(f'Bots: {num_bots}\t Rate: {rate}\t Jitter: {jitter}\t '
+          f'p50: {statistics.median(latencies) * 1e3:.1f} ms\t p99: {percentile(latencies, 99) * 1e3:.1f} ms\t '
+          f'Requests/detection: {statistics.mean(requests):.0f}\t '
+          f'Requests/s: {sum(requests) / sum(durations):.0f}')
+    if checker.hedge_policy is not None:
+        print(f'\t {checker.hedge_policy.describe()}')
+
+
+async def main(args):
+    server = StandInServer(pollster = args.pollster, poll_value = ALTERNATE_VALUES[args.pollster][0],
+                           latency = args.latency, latency_spread = args.spread, error_rate = args.error_rate,
+                           stall_rate = args.stall_rate)
+    server.start()
+    try:
+        MarketData.API_URL = server.url + '/api/marketdata/markets/{}'
+        market = MarketData(server.market_num)
+        for num_bots in BOT_COUNTS:
+            for request_rate, jitter in SCHEDULES:
+                await run_setting(server, market, num_bots, request_rate, jitter, args.trials, args.hedge)
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Detection latency benchmark against a local stand-in server.')
+    parser.add_argument('--pollster', default = 'fte', choices = ['fte', 'rcp'])
+    parser.add_argument('--trials', type = int, default = 10)
+    parser.add_argument('--latency', type = float, default = 0.02, help = 'Seconds added to every poll response.')
+    parser.add_argument('--spread', type = float, default = 0.02, help = 'Extra random seconds per poll response.')
+    parser.add_argument('--error-rate', type = float, default = 0.0, help = 'Fraction of poll requests failing.')
+    parser.add_argument('--stall-rate', type = float, default = 0.0, help = 'Fraction of poll requests stalling 1 s.')
+    parser.add_argument('--hedge', type = float, default = None, help = 'Hedge requests after this latency percentile.')
+    asyncio.run(main(parser.parse_args()))
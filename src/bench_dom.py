@@ -0,0 +1,74 @@
+'''
+Benchmark of PiTrader's order preparation in the browser, on a static copy
+of the stand-in market page. Compares locating every element on every call
+(the old sequence), cached element handles, and the single script fill.
+
+Usage: python bench_dom.py [chromedriver_path]
+
+Skipped if Chrome or chromedriver cannot be started.
+
+'''
+import os
+import sys
+import tempfile
+import time
+import statistics
+from standinserver import StandInServer
+
+
+NUM_ORDERS = 50
+
+
+def time_preparations(trader, num_brackets, forget):
+    select_times = []
+    fill_times = []
+    for i in range(NUM_ORDERS):
+        if forget:
+            trader.elements = {}
+        start = time.perf_counter()
+        trader.select_contract(i % num_brackets, i % 2 == 0)
+        selected = time.perf_counter()
+        trader.enter_buy_info(quantity = 1, limit_price = 50)
+        filled = time.perf_counter()
+        select_times.append(selected - start)
+        fill_times.append(filled - selected)
+    return select_times, fill_times
+
+
+def report(name, select_times, fill_times):
+    print(f'{name}')
+    print(f'\t select_contract: median {statistics.median(select_times) * 1e3:.2f} ms\t '
+          f'max {max(select_times) * 1e3:.2f} ms')
+    print(f'\t enter_buy_info:  median {statistics.median(fill_times) * 1e3:.2f} ms\t '
+          f'max {max(fill_times) * 1e3:.2f} ms')
+
+
+def main(chromedriver_path = 'chromedriver'):
+    server = StandInServer() #Only renders the page, it is not started
+    with tempfile.NamedTemporaryFile('w', suffix = '.html', delete = False) as f:
+        f.write(server.market_page())
+    try:
+        try:
+            from pitrader import PiTrader
+            trader = PiTrader(server.market_num, chromedriver_path = chromedriver_path, launch = False)
+            trader.start_browser()
+        except Exception as e:
+            print(f'PiTrader\n\t skipped: {repr(e)}')
+            return
+        try:
+            trader.driver.get('file://' + f.name)
+            trader.current_handle = trader.main_handle = trader.driver.current_window_handle
+            num_brackets = len(server.market_data['contracts'])
+            for name, scripted_input, forget in (('Lookup on every call', False, True),
+                                                 ('Cached element handles', False, False),
+                                                 ('Single script fill', True, False)):
+                trader.scripted_input = scripted_input
+                report(name, *time_preparations(trader, num_brackets, forget))
+        finally:
+            trader.close()
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
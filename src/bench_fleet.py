@@ -0,0 +1,63 @@
+'''
+Checking throughput of a BotFleet against a local StandInServer, for a
+growing number of worker processes.
+
+Usage: python bench_fleet.py [--pollster rcp|fte] [--bots 8] [--duration 3]
+                             [--parse-workers 0]
+
+The stand-in server runs in this process, so at high process counts its
+own event loop can become the limit.
+
+'''
+import argparse
+import os
+import time
+from standinserver import StandInServer
+from marketdata import MarketData
+from fleet import BotFleet
+
+
+ALTERNATE_VALUES = {
+    'fte': [43.1234, 44.2234],
+    'rcp': [('Biden', 4.5), ('Biden', 6.5)],
+}
+
+
+def run_setting(server, market, num_processes, args):
+    poll_url = server.rcp_url if args.pollster == 'rcp' else server.fte_url
+    fleet = BotFleet(server.market_num, num_processes, bots_per_process = args.bots, market = market,
+                     use_proxy = False, parse_workers = args.parse_workers or None, poll_url = poll_url)
+    with fleet:
+        values = ALTERNATE_VALUES[args.pollster]
+        new_value = values[1] if server.current_value() == values[0] else values[0]
+        started = time.time()
+        changed_at = started + args.duration
+        server.schedule_value(new_value, changed_at)
+        fleet.detect_change()
+        elapsed = time.time() - started
+    print(f'Processes: {num_processes}\t Bots: {num_processes * args.bots}\t '
+          f'Checks/s: {fleet.last_checks / elapsed:.0f}\t '
+          f'Detection latency: {(fleet.detected_at - changed_at) * 1e3:.1f} ms')
+
+
+def main(args):
+    server = StandInServer(pollster = args.pollster, poll_value = ALTERNATE_VALUES[args.pollster][0])
+    server.start()
+    try:
+        MarketData.API_URL = server.url + '/api/marketdata/markets/{}'
+        market = MarketData(server.market_num)
+        num_processes = 1
+        while num_processes <= max(1, os.cpu_count() or 1):
+            run_setting(server, market, num_processes, args)
+            num_processes *= 2
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'BotFleet throughput against a local stand-in server.')
+    parser.add_argument('--pollster', default = 'rcp', choices = ['fte', 'rcp'])
+    parser.add_argument('--bots', type = int, default = 8, help = 'Bots per process.')
+    parser.add_argument('--duration', type = float, default = 3.0, help = 'Seconds until the value changes.')
+    parser.add_argument('--parse-workers', type = int, default = 0, help = 'Parse process pool size per worker.')
+    main(parser.parse_args())
@@ -0,0 +1,55 @@
+'''
+Microbenchmark comparing RcpExtractor with the BeautifulSoup parse used by
+PollChecker.parse_rcp().
+
+Usage: python bench_rcp_parse.py [saved_rcp_page.html ...]
+
+Each saved page is cut to the same 15k chunk that fetch_rcp() reads. If no
+pages are given, a synthetic page with the RCP table layout is used.
+
+'''
+import sys
+import timeit
+from rcpextractor import RcpExtractor
+from pollchecker import PollChecker
+
+
+CHUNK_SIZE = 15000
+PIECE_SIZE = 1400 #Roughly one TCP segment per feed() call
+
+
+def synthetic_page():
+    head = '<html><head><title>General Election: Trump vs. Biden</title>'
+    head += ''.join(f'<script>var s{i} = "{"x" * 80}";</script>\n' for i in range(60))
+    head += '</head><body><div id="polling-data-rcp"><table class="data">'
+    head += '<tr class="header"><th>Poll</th><th>Date</th><th>Sample</th><th>Biden (D)</th><th>Trump (R)</th><th>Spread</th></tr>'
+    row = '<tr class="rcpAvg"><td class="noCenter">RCP Average</td><td>4/14 - 5/4</td><td>--</td>' \
+          '<td>47.4</td><td>43.4</td><td class="spread"><span class="dem">Biden +4.0</span></td></tr>'
+    polls = ''.join('<tr><td class="noCenter">Poll</td><td>5/1 - 5/3</td><td>1000 RV</td>'
+                    '<td>48</td><td>43</td><td class="spread">Biden +5</td></tr>' for i in range(40))
+    return (head + row + polls + '</table></div></body></html>').encode('utf-8')
+
+
+def bench(name, raw, number):
+    chunk = raw[:CHUNK_SIZE]
+    fast = RcpExtractor.extract(chunk, PIECE_SIZE)
+    slow = PollChecker.parse_rcp(chunk.decode('utf-8', errors = 'ignore'))
+    assert fast == slow, f'{name}: extractor returned {fast}, parse_rcp returned {slow}'
+    fast_time = timeit.timeit(lambda: RcpExtractor.extract(chunk, PIECE_SIZE), number = number)
+    slow_time = timeit.timeit(lambda: PollChecker.parse_rcp(chunk.decode('utf-8', errors = 'ignore')), number = number)
+    print(f'{name}\t result: {fast}')
+    print(f'\t RcpExtractor: {fast_time / number * 1e6:.1f} us/page')
+    print(f'\t parse_rcp:    {slow_time / number * 1e6:.1f} us/page')
+    print(f'\t speedup:      {slow_time / fast_time:.1f}x')
+
+
+def main(paths, number = 200):
+    if not paths:
+        bench('synthetic', synthetic_page(), number)
+    for path in paths:
+        with open(path, 'rb') as f:
+            bench(path, f.read(), number)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
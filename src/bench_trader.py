@@ -0,0 +1,78 @@
+'''
+Benchmark comparing HttpTrader with the Selenium driven PiTrader against a
+local StandInServer, with no network.
+
+Usage: python bench_trader.py [chromedriver_path]
+
+The Selenium path is skipped if Chrome or chromedriver cannot be started.
+
+'''
+import sys
+import time
+import statistics
+from standinserver import StandInServer
+from marketdata import MarketData
+from httptrader import HttpTrader
+
+
+NUM_ORDERS = 50
+
+
+def report(name, startup, prepare_times, execute_times):
+    print(f'{name}')
+    print(f'\t startup (login): {startup * 1e3:.1f} ms')
+    print(f'\t prepare_a_purchase: median {statistics.median(prepare_times) * 1e3:.2f} ms\t '
+          f'max {max(prepare_times) * 1e3:.2f} ms')
+    print(f'\t execute_order:      median {statistics.median(execute_times) * 1e3:.2f} ms\t '
+          f'max {max(execute_times) * 1e3:.2f} ms')
+
+
+def time_orders(trader, num_brackets):
+    prepare_times = []
+    execute_times = []
+    for i in range(NUM_ORDERS):
+        start = time.perf_counter()
+        trader.prepare_a_purchase(bracket_num = i % num_brackets, quantity = 1, is_yes = (i % 2 == 0))
+        prepared = time.perf_counter()
+        trader.execute_order()
+        executed = time.perf_counter()
+        prepare_times.append(prepared - start)
+        execute_times.append(executed - prepared)
+    return prepare_times, execute_times
+
+
+def bench_http(server):
+    MarketData.API_URL = server.url + '/api/marketdata/markets/{}'
+    market = MarketData(server.market_num)
+    start = time.perf_counter()
+    trader = HttpTrader(server.market_num, server.email, server.password, market = market, base_url = server.url)
+    startup = time.perf_counter() - start
+    prepare_times, execute_times = time_orders(trader, len(market.get_contract_ids()))
+    trader.close()
+    report('HttpTrader', startup, prepare_times, execute_times)
+
+
+def bench_selenium(server, chromedriver_path):
+    try:
+        from pitrader import PiTrader
+        PiTrader.MARKET_URL = server.url + '/markets/detail/{}'
+        start = time.perf_counter()
+        trader = PiTrader(server.market_num, server.email, server.password, chromedriver_path = chromedriver_path)
+        startup = time.perf_counter() - start
+    except Exception as e:
+        print(f'PiTrader\n\t skipped: {repr(e)}')
+        return
+    prepare_times, execute_times = time_orders(trader, len(server.market_data['contracts']))
+    trader.close()
+    report('PiTrader (Selenium)', startup, prepare_times, execute_times)
+
+
+def main(chromedriver_path = 'chromedriver'):
+    with StandInServer() as server:
+        bench_http(server)
+        bench_selenium(server, chromedriver_path)
+        print(f'Trades received by the stand-in server: {len(server.trades)}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
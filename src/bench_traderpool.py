@@ -0,0 +1,68 @@
+'''
+Benchmark of TraderPool batches against a local StandInServer, with HTTP
+sessions. Times a batch against placing the same orders one by one, then
+revokes every session mid-batch and checks that the batch still returns
+with every order sent, on the sessions that replace the dead ones.
+
+Usage: python bench_traderpool.py [pool_size] [trade_latency]
+
+'''
+import sys
+import threading
+import time
+from standinserver import StandInServer
+from marketdata import MarketData
+from decisiontable import Order
+from traderpool import TraderPool
+import maintenance
+
+
+def make_orders(num_orders, num_brackets):
+    return [Order(i % num_brackets, 1, i % 2 == 0, 50) for i in range(num_orders)]
+
+
+def run_batch(pool, orders, timeout = 30.0):
+    #Run aside, so a hung batch fails the check instead of the benchmark
+    results = []
+    thread = threading.Thread(target = lambda: results.extend(pool.execute_batch(orders)), daemon = True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'Batch did not return.'
+    return results
+
+
+def main(pool_size = 3, trade_latency = 0.2):
+    pool_size = int(pool_size)
+    maintenance.raise_for_under_maintenance = lambda: None #The stand-in has no maintenance window
+    with StandInServer(trade_latency = float(trade_latency)) as server:
+        market = MarketData.from_dict(server.market_num, server.market_data)
+        num_brackets = len(market.get_contract_ids())
+        pool = TraderPool(server.market_num, pool_size, server.email, server.password, trader = 'http',
+                          market = market, trader_kwargs = {'base_url': server.url}, retry_interval = 0.1)
+        try:
+            pool.start()
+            while len(pool.traders) < pool_size:
+                time.sleep(0.01)
+            orders = make_orders(pool_size, num_brackets)
+            start = time.perf_counter()
+            for order in orders:
+                run_batch(pool, [order])
+            one_by_one = time.perf_counter() - start
+            results = run_batch(pool, orders)
+            print(pool.describe(results))
+            print(f'One by one: {one_by_one * 1e3:.1f} ms')
+
+            #Every session dies, and the batch holds more orders than sessions
+            server.tokens.clear()
+            start = time.perf_counter()
+            results = run_batch(pool, make_orders(pool_size + 2, num_brackets))
+            print(f'\nSessions revoked mid-batch, returned in {(time.perf_counter() - start) * 1e3:.1f} ms')
+            print(pool.describe(results))
+            assert pool.replaced >= pool_size, 'Dead sessions were not replaced.'
+            assert all(result.is_sent for result in results), 'Orders were lost with their sessions.'
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
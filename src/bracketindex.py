@@ -0,0 +1,120 @@
+from bisect import bisect_right
+import numpy as np
+
+
+class BracketIndex:
+    '''
+    Precompiled lookup from poll values to bracket indices. Built once per
+    market so the pollster and the RCP sign convention are resolved up front
+    and each lookup is a single bisect.
+
+    Typical usage: init() -> classify() for live values, or
+                   init() -> classify_many() for whole arrays of values
+
+    '''
+    #Bracket ranges of the RCP market are relative to Trump
+    RCP_SIGNS = {'trump': -1.0, 'biden': 1.0}
+    RCP_MIN_SPREAD = 0
+    RCP_MAX_SPREAD = 20
+    NO_BRACKET = -1 #Returned by classify_many() for values above every bound
+
+    def __init__(self, bracket_bounds, pollster):
+        '''
+        Desc:
+            Stores the sorted upper bounds and the pollster convention.
+
+        Params:
+            bracket_bounds (list of nums): Upper bounds as defined by the market.
+                First value in list is the upper bound for the first bracket.
+            pollster (str): 'rcp' or 'fte'.
+
+        '''
+        self.bounds = list(bracket_bounds)
+        self.bounds_array = np.asarray(self.bounds, dtype = float)
+        self.pollster = pollster
+        self.is_rcp = (pollster == 'rcp')
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def rcp_spread(self, raw_rcp):
+        '''
+        Desc:
+            Converts a (leader, spread) pair from RCP into a single signed value.
+
+            EG  raw_rcp = ("trump", 2.5) = -2.5
+
+        '''
+        leader, spread = raw_rcp
+        if (spread < self.RCP_MIN_SPREAD) or (spread > self.RCP_MAX_SPREAD): #Checks for unexpected avg
+            raise Exception('RCP average is bad. It is {}'.format(spread))
+        sign = self.RCP_SIGNS.get(leader.lower())
+        if sign is None:
+            raise Exception('Current leader is unknown. It is {}'.format(leader.lower()))
+        return sign * spread
+
+    def classify(self, raw_value):
+        '''
+        Desc:
+            Returns the bracket index a single raw poll value falls into.
+
+        Params:
+            raw_value (numerical or tuple(str, num)): literal polling value
+                from the polling src.
+
+        Returns:
+            target_bracket (int): Index of corresponding bracket, base 0.
+                None if the value is above every bound.
+
+        '''
+        if self.is_rcp:
+            raw_value = self.rcp_spread(raw_value)
+        target_bracket = bisect_right(self.bounds, raw_value)
+        if target_bracket == len(self.bounds):
+            return None
+        return target_bracket
+
+    def rcp_spreads(self, spreads, leaders):
+        '''
+        Desc:
+            Vectorized rcp_spread(). Leaders are mapped through their unique
+            values so the string handling cost does not scale with the array.
+
+        '''
+        spreads = np.asarray(spreads, dtype = float)
+        if np.any((spreads < self.RCP_MIN_SPREAD) | (spreads > self.RCP_MAX_SPREAD)):
+            raise Exception('RCP average is bad. Out of range spreads found.')
+        unique_leaders, inverse = np.unique(np.asarray(leaders, dtype = str), return_inverse = True)
+        signs = np.empty(len(unique_leaders))
+        for i, leader in enumerate(unique_leaders):
+            sign = self.RCP_SIGNS.get(leader.lower())
+            if sign is None:
+                raise Exception('Current leader is unknown. It is {}'.format(leader.lower()))
+            signs[i] = sign
+        return spreads * signs[inverse.reshape(spreads.shape)]
+
+    def classify_many(self, raw_values, leaders = None):
+        '''
+        Desc:
+            Classifies a whole array of poll values in one vectorized call.
+
+        Params:
+            raw_values (array-like): Poll values. For RCP markets this is
+                either a sequence of (leader, spread) pairs, or the spreads
+                alone when leaders is given.
+            leaders (array-like of str): Optional leaders matching raw_values,
+                RCP markets only.
+
+        Returns:
+            target_brackets (numpy int array): Bracket index of every value.
+                NO_BRACKET for values above every bound.
+
+        '''
+        if self.is_rcp:
+            if leaders is None:
+                leaders, raw_values = zip(*raw_values) if len(raw_values) else ((), ())
+            values = self.rcp_spreads(raw_values, leaders)
+        else:
+            values = np.asarray(raw_values, dtype = float)
+        target_brackets = np.searchsorted(self.bounds_array, values, side = 'right')
+        return np.where(target_brackets == len(self.bounds), self.NO_BRACKET, target_brackets)
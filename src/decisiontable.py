@@ -0,0 +1,140 @@
+import time
+from collections import namedtuple
+
+
+#Fields in the order of the traders' prepare_a_purchase() parameters
+Order = namedtuple('Order', ['bracket_num', 'quantity', 'is_yes', 'limit_price'])
+
+
+def contract_prices(market):
+    '''
+    Desc:
+        Best prices of every bracket's contract, in cents.
+
+    Params:
+        market (MarketData): Market to read the prices from.
+
+    Returns:
+        prices (list of dicts): prices[i] holds 'buy_yes' and 'buy_no' of
+            bracket i, None where there is no offer.
+
+    '''
+    contracts = {con['id']: con for con in market.market_data['contracts']}
+    prices = []
+    for contract_id in market.get_contract_ids():
+        con = contracts[contract_id]
+        prices.append({side: None if con.get(field) is None else round(con[field] * 100)
+                       for side, field in (('buy_yes', 'bestBuyYesCost'), ('buy_no', 'bestBuyNoCost'))})
+    return prices
+
+
+class BuyNewBracket:
+    '''
+    Default strategy: buys YES on the bracket the value moved into and,
+    optionally, NO on the bracket it left. Limits are the current offer
+    plus some slippage, capped at max_price, and quantities are cut down
+    to PredictIt's per-contract limit.
+
+    '''
+    def __init__(self, quantity = 100, max_price = 90, slippage = 2, buy_no_on_old = False, max_cost = 850):
+        '''
+        Params:
+            quantity (int): Shares per order.
+            max_price (int): Highest limit price in cents.
+            slippage (int): Cents above the best offer the limit is set at,
+                so the order still fills when the offer moves first.
+            buy_no_on_old (bool): Also buy NO on the bracket left behind.
+            max_cost (float): Dollars one contract position may cost.
+
+        '''
+        self.quantity = quantity
+        self.max_price = max_price
+        self.slippage = slippage
+        self.buy_no_on_old = buy_no_on_old
+        self.max_cost = max_cost
+
+    def order(self, bracket_num, is_yes, offer):
+        limit_price = self.max_price
+        if offer is not None:
+            limit_price = min(self.max_price, offer + self.slippage)
+        quantity = min(self.quantity, int(self.max_cost * 100 // limit_price))
+        if quantity <= 0:
+            return None
+        return Order(bracket_num, quantity, is_yes, limit_price)
+
+    def __call__(self, prices, old_bracket, new_bracket):
+        '''
+        Params:
+            prices (list of dicts): See contract_prices().
+            old_bracket (int): Bracket the value was in.
+            new_bracket (int): Bracket the value moved into.
+
+        Returns:
+            orders (list of Orders)
+
+        '''
+        orders = [self.order(new_bracket, True, prices[new_bracket]['buy_yes'])]
+        if self.buy_no_on_old:
+            orders.append(self.order(old_bracket, False, prices[old_bracket]['buy_no']))
+        return [order for order in orders if order is not None]
+
+
+class DecisionTable:
+    '''
+    Every order to place for every possible bracket change, worked out ahead
+    of time from the market's prices and a strategy. At detection time the
+    decision is a single dictionary lookup. With an AsyncMarketData the
+    table is rebuilt after every market refresh.
+
+    Typical usage: init() -> lookup(old_bracket, new_bracket) -> (trader.prepare_a_purchase(*order) for each order)
+
+    '''
+    def __init__(self, market, strategy = None):
+        '''
+        Desc:
+            Builds the table and subscribes to the market's refreshes if it
+            has any.
+
+        Params:
+            market (MarketData): Market to trade.
+            strategy (callable): strategy(prices, old_bracket, new_bracket)
+                returning the list of Orders for a change. See BuyNewBracket,
+                the default.
+
+        '''
+        self.market = market
+        self.strategy = strategy or BuyNewBracket()
+        self.table = {}
+        self.builds = 0
+        self.built_at = None
+        self.build()
+        if hasattr(market, 'add_listener'):
+            market.add_listener(self.on_refresh)
+
+    def build(self):
+        prices = contract_prices(self.market)
+        num_brackets = len(prices)
+        table = {}
+        for old_bracket in range(num_brackets):
+            for new_bracket in range(num_brackets):
+                if old_bracket != new_bracket:
+                    table[(old_bracket, new_bracket)] = tuple(self.strategy(prices, old_bracket, new_bracket))
+        self.table = table #Swapped in whole, so a lookup never sees a half built table
+        self.builds += 1
+        self.built_at = time.time()
+
+    def on_refresh(self, market, brackets_changed):
+        self.build()
+
+    def lookup(self, old_bracket, new_bracket):
+        '''
+        Returns:
+            orders (tuple of Orders): Empty if nothing is to be placed.
+
+        '''
+        return self.table.get((old_bracket, new_bracket), ())
+
+    def describe(self):
+        planned = sum(1 for orders in self.table.values() if orders)
+        return (f'Transitions: {len(self.table)}\t With orders: {planned}\t Builds: {self.builds}\t '
+                f'Age: {round(time.time() - self.built_at, 1)} s')
@@ -0,0 +1,236 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import wait
+from marketdata import MarketData
+from pollchecker import PollChecker
+
+
+#Messages between the fleet and its workers
+DETECT = 'detect'
+CANCEL = 'cancel'
+STOP = 'stop'
+READY = 'ready'
+CHANGE = 'change'
+CANCELLED = 'cancelled'
+
+
+def total_checks(checker):
+    return sum(checker.metrics.counters.get('checks', {}).values())
+
+
+async def serve(worker_id, conn, checker):
+    '''
+    Desc:
+        Worker event loop. Runs a detection per DETECT command until the
+        checker detects a change or the fleet sends CANCEL. Every DETECT
+        is answered with exactly one CHANGE or CANCELLED message, and is
+        followed by exactly one CANCEL from the fleet.
+
+    '''
+    loop = asyncio.get_running_loop()
+    async with PollChecker.make_session() as session:
+        await checker.warm_up(session)
+        conn.send((READY, worker_id, None, None, 0))
+        while True:
+            command = await loop.run_in_executor(None, conn.recv)
+            if command == STOP:
+                return
+            checks_before = total_checks(checker)
+            detection = asyncio.ensure_future(checker.detect_change(session))
+            cancel = asyncio.ensure_future(loop.run_in_executor(None, conn.recv))
+            await asyncio.wait([detection, cancel], return_when = asyncio.FIRST_COMPLETED)
+            if detection.done() and (detection.result() is not None):
+                conn.send((CHANGE, worker_id, detection.result(), checker.detected_at,
+                           total_checks(checker) - checks_before))
+                await cancel
+                continue
+            detection.cancel()
+            try:
+                await detection
+            except asyncio.CancelledError:
+                pass
+            conn.send((CANCELLED, worker_id, None, None, total_checks(checker) - checks_before))
+
+
+def run_worker(worker_id, conn, market_num, market_data, checker_kwargs, poll_url, parse_workers):
+    '''
+    Desc:
+        Entry point of a worker process. Builds its own PollChecker from
+        the fleet's market data, so no worker requests the market again.
+
+    '''
+    market = MarketData.from_dict(market_num, market_data)
+    parse_executor = None
+    if parse_workers:
+        parse_executor = ProcessPoolExecutor(parse_workers)
+    checker = PollChecker(market_num, market = market, parse_executor = parse_executor, **checker_kwargs)
+    if poll_url is not None:
+        checker.RCP_URL = poll_url
+        checker.FTE_URL = poll_url
+    try:
+        asyncio.run(serve(worker_id, conn, checker))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if parse_executor is not None:
+            parse_executor.shutdown(cancel_futures = True)
+
+
+class BotFleet:
+    '''
+    Spreads the poll checking bots over several worker processes, each with
+    its own event loop and HTTP session, so checking throughput scales with
+    cores instead of saturating one. Workers report changes back over a
+    pipe and the first change detected by any worker cancels the others.
+    Workers are kept alive between detections.
+
+    The most common usage is: init() -> start() -> detect_change() -> close()
+
+    '''
+    def __init__(self, market_num, num_processes, proxy_username = None, proxy_password = None,
+                 bots_per_process = None, request_rate = None, jitter = 0.0, market = None, pool_size = None,
+                 use_proxy = True, parse_workers = None, poll_url = None):
+        '''
+        Desc:
+            Retrieves the market data and prompts for missing settings. The
+            workers are not started until start().
+
+        Params:
+            market_num (int): PredictIt number assigned to specific market.
+            num_processes (int): Number of worker processes.
+            proxy_username (str): Username for proxy service.
+            proxy_password (str): Password for proxy service.
+            bots_per_process (int): Poll checking bots in each worker.
+            request_rate (float): Target requests per second across the
+                whole fleet, split evenly between the workers.
+            jitter (float): See PollChecker.
+            market (MarketData): Already retrieved market data for market_num.
+                Retrieved if None.
+            pool_size (int): Proxy sessions per worker. See PollChecker.
+            use_proxy (bool): See PollChecker.
+            parse_workers (int): If given, every worker also parses in a
+                process pool of this size. See PollChecker.parse_executor.
+            poll_url (str): Overrides the poll source URL, e.g. to check a
+                local StandInServer.
+
+        '''
+        assert num_processes > 0, 'Fleet needs at least one process.'
+        if market is None:
+            market = MarketData(market_num)
+        if bots_per_process is None:
+            bots_per_process = int(input("How many checking bots to use per process? "))
+        if (proxy_username is None) and use_proxy:
+            proxy_username = input("Username for proxy service? ")
+        if (proxy_password is None) and use_proxy:
+            proxy_password = input("Password for proxy service? ")
+        self.market = market
+        self.market_num = market_num
+        self.num_processes = num_processes
+        self.parse_workers = parse_workers
+        self.poll_url = poll_url
+        worker_rate = None if request_rate is None else request_rate / num_processes
+        self.checker_kwargs = {
+            'proxy_username': proxy_username,
+            'proxy_password': proxy_password,
+            'num_bots': bots_per_process,
+            'request_rate': worker_rate,
+            'jitter': jitter,
+            'pool_size': pool_size,
+            'use_proxy': use_proxy,
+        }
+        self.processes = []
+        self.conns = []
+        self.detected_at = None
+        self.winner = None #Worker ID of the latest detection
+        self.last_checks = 0 #Checks made by the whole fleet in the latest detection
+
+    def start(self):
+        '''
+        Desc:
+            Starts the workers and waits until every one has warmed up
+            its connections.
+
+        '''
+        #Spawned rather than forked, so workers never inherit a running loop or threads
+        context = multiprocessing.get_context('spawn')
+        for worker_id in range(self.num_processes):
+            conn, worker_conn = context.Pipe()
+            #Not daemonic, since a worker may start its own parse pool
+            process = context.Process(target = run_worker,
+                                      args = (worker_id, worker_conn, self.market_num, self.market.market_data,
+                                              self.checker_kwargs, self.poll_url, self.parse_workers))
+            process.start()
+            worker_conn.close()
+            self.processes.append(process)
+            self.conns.append(conn)
+        for conn in self.conns:
+            try:
+                kind = conn.recv()[0]
+            except EOFError:
+                self.close()
+                raise Exception('A fleet worker failed to start.')
+            assert kind == READY, f'Unexpected worker message: {kind}'
+
+    def detect_change(self):
+        '''
+        Desc:
+            Runs every worker until one of them detects a bracket change.
+
+        Returns:
+            new_bracket (int): The index of the new bracket which the polling
+                value has just changed into.
+
+        '''
+        assert self.conns, 'Fleet is not started.'
+        for conn in self.conns:
+            conn.send(DETECT)
+        new_bracket = None
+        self.last_checks = 0
+        pending = list(self.conns)
+        while pending:
+            for conn in wait(pending):
+                pending.remove(conn)
+                try:
+                    kind, worker_id, bracket, detected_at, checks = conn.recv()
+                except EOFError:
+                    self.remove_worker(conn)
+                    continue
+                self.last_checks += checks
+                if (kind == CHANGE) and (new_bracket is None):
+                    new_bracket = bracket
+                    self.detected_at = detected_at
+                    self.winner = worker_id
+                    for other in self.conns:
+                        other.send(CANCEL)
+            if (not self.conns) and (new_bracket is None):
+                raise Exception('Every fleet worker has died.')
+        return new_bracket
+
+    def remove_worker(self, conn):
+        index = self.conns.index(conn)
+        process = self.processes.pop(index)
+        self.conns.pop(index)
+        print(f'Fleet worker exited with code {process.exitcode}.')
+
+    def close(self, timeout = 5):
+        for conn in self.conns:
+            try:
+                conn.send(STOP)
+            except (BrokenPipeError, OSError):
+                pass
+        deadline = time.time() + timeout
+        for process in self.processes:
+            process.join(max(0, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.conns = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,91 @@
+from collections import deque
+
+
+class HedgePolicy:
+    '''
+    Decides when a slow poll request is hedged with a second one. The hedge
+    delay is a percentile of the recent successful request latencies, and
+    hedges are capped at a fraction of all requests so a slow source cannot
+    double the request volume.
+
+    Typical usage: init() -> (per request) hedge_delay() -> record() / hedged()
+
+    '''
+    def __init__(self, percentile = 95, max_extra = 0.1, window = 200, min_samples = 20, refresh_every = 20):
+        '''
+        Params:
+            percentile (float): Requests still unanswered after this
+                percentile of recent latency are hedged.
+            max_extra (float): Maximum hedges as a fraction of requests.
+            window (int): Number of recent latencies kept.
+            min_samples (int): Latencies needed before hedging starts.
+            refresh_every (int): Latencies recorded between recomputations
+                of the hedge delay.
+
+        '''
+        assert 0 < percentile < 100, 'Percentile must be within (0, 100).'
+        self.percentile = percentile
+        self.max_extra = max_extra
+        self.latencies = deque(maxlen = window)
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self.since_refresh = 0
+        self.delay = None
+        self.requests = 0
+        self.hedges_issued = 0
+        self.hedge_wins = 0
+        self.censored = 0
+
+    def record(self, latency, is_censored = False):
+        '''
+        Params:
+            latency (float): Seconds a request took.
+            is_censored (bool): Whether latency is only a lower bound, for
+                a request cancelled after losing to its hedge. Leaving those
+                out would keep only the fast requests and pull the delay
+                down.
+
+        '''
+        if is_censored:
+            self.censored += 1
+        self.latencies.append(latency)
+        self.since_refresh += 1
+        if (self.since_refresh >= self.refresh_every) and (len(self.latencies) >= self.min_samples):
+            ordered = sorted(self.latencies)
+            self.delay = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+            self.since_refresh = 0
+
+    def hedge_delay(self):
+        '''
+        Desc:
+            Counts a new request and tells how long to wait before hedging it.
+
+        Returns:
+            delay (float): Seconds, or None if the request must not be
+                hedged, either for lack of latency samples or because the
+                hedge budget is spent.
+
+        '''
+        self.requests += 1
+        if self.delay is None:
+            return None
+        if self.hedges_issued >= self.max_extra * self.requests:
+            return None
+        return self.delay
+
+    def hedged(self):
+        self.hedges_issued += 1
+
+    def won(self):
+        self.hedge_wins += 1
+
+    @property
+    def win_ratio(self):
+        if self.hedges_issued == 0:
+            return 0.0
+        return self.hedge_wins / self.hedges_issued
+
+    def describe(self):
+        delay = None if self.delay is None else round(self.delay * 1e3, 1)
+        return (f'Hedge delay: {delay} ms\t Requests: {self.requests}\t Hedges: {self.hedges_issued}\t '
+                f'Hedge wins: {self.hedge_wins}\t Win ratio: {round(self.win_ratio, 3)}\t Censored: {self.censored}')
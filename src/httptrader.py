@@ -0,0 +1,138 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from marketdata import MarketData
+import maintenance
+
+
+class HttpTrader:
+    '''
+    Trader that submits orders straight to PredictIt's JSON endpoints over a
+    pooled keep-alive HTTP session, as a fast alternative to the Selenium
+    driven PiTrader. Shares PiTrader's interface.
+
+    Typical usage: prepare_a_purchase() --> execute_order() --> close() (must conduct in this order)
+
+    '''
+    BASE_URL = 'https://www.predictit.org'
+    BUY_NO = 0
+    BUY_YES = 1
+
+    def __init__(self, market_num, email = None, password = None, market = None, base_url = None, pool_size = 4):
+        '''
+        Desc:
+            Checks if PredictIt is under maintenance. If not, the trader
+            resolves the market's contract IDs and logs in once.
+
+        Params:
+            market_num (int): PredictIt number assigned to specific market.
+            email (str): PredictIt login. Prompted for if None.
+            password (str): PredictIt password. Prompted for if None.
+            market (MarketData): Already retrieved market data. Retrieved
+                if None.
+            base_url (str): Site root, e.g. a local StandInServer url.
+            pool_size (int): Number of keep-alive connections to keep.
+
+        '''
+        assert isinstance(market_num, int)
+        maintenance.raise_for_under_maintenance()
+        self.base_url = base_url or self.BASE_URL
+        if market is None:
+            market = MarketData(market_num)
+        self.market = market
+        self.contract_ids = market.get_contract_ids()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.order_request = None
+        self.order_is_ready = False
+        self.token_expires_at = None
+        self.login(email, password)
+
+    def login(self, email = None, password = None):
+        '''
+        Desc:
+            Requests a bearer token and attaches it to the session.
+            Prompts user for login info that was not passed in.
+
+        Params:
+            email (str): PredictIt login.
+            password (str): PredictIt password.
+
+        '''
+        if email is None:
+            email = input("Enter your PredictIt login: ")
+        if password is None:
+            password = input("Enter your PredictIt password: ")
+        form = {'email': email, 'password': password, 'grant_type': 'password', 'rememberMe': 'false'}
+        response = self.session.post(f'{self.base_url}/api/Account/token', data = form, timeout = 5)
+        response.raise_for_status()
+        token = response.json()
+        self.session.headers['Authorization'] = f"Bearer {token['access_token']}"
+        self.token_expires_at = time.time() + token.get('expires_in', 0)
+
+    def prepare_a_purchase(self, bracket_num, quantity, is_yes, limit_price = 90):
+        '''
+        Desc:
+            Builds the complete trade request so that execute_order() only
+            has to send it. Must be run before every purchase.
+
+        Params:
+            bracket_num (int): Bracket to purchase shares from. Top to bottom, 0 -> 8.
+            quantity (int): Number of shares to purchase.
+            is_yes (bool): Indicate purchase of YES shares or NO shares.
+            limit_price (int): Highest price paid per share, in cents.
+
+        '''
+        assert isinstance(bracket_num, int)
+        assert isinstance(quantity, int)
+        assert isinstance(is_yes, bool)
+        order = {
+            'contractId': self.contract_ids[bracket_num],
+            'tradeType': self.BUY_YES if is_yes else self.BUY_NO,
+            'pricePerShare': limit_price / 100,
+            'quantity': quantity,
+        }
+        request = requests.Request('POST', f'{self.base_url}/api/Trade/SubmitTrade', json = order)
+        self.order_request = self.session.prepare_request(request)
+        self.describe_order(bracket_num, quantity, is_yes)
+        self.order_is_ready = True
+
+    def execute_order(self):
+        '''
+        Desc:
+            Sends a prepared order.
+            Throws exception if order_is_ready = False or the order is rejected.
+
+        Returns:
+            response (dict): Parsed JSON response of the trade endpoint.
+
+        '''
+        assert self.order_is_ready, 'Order is not prepared.'
+        self.order_is_ready = False
+        response = self.session.send(self.order_request, timeout = 5)
+        print(f'ORDER EXECUTED. Time is: {time.localtime()}')
+        if response.status_code == 401:
+            self.token_expires_at = 0.0 #Token was revoked, a new login is needed
+        response.raise_for_status()
+        return response.json()
+
+    def is_alive(self):
+        '''
+        Desc:
+            Whether the session is still logged in, as far as is known
+            without a request.
+
+        '''
+        return (self.token_expires_at is not None) and (time.time() < self.token_expires_at)
+
+    def close(self):
+        self.session.close()
+
+    def describe_order(self, bracket_num, quantity, is_yes):
+        s = 'NO'
+        if is_yes:
+            s = 'YES'
+        print(f'Prepared to purchase {quantity} shares of BUY {s} in bracket {bracket_num}.')
+        print('Execute order when ready.')
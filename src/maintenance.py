@@ -0,0 +1,51 @@
+import datetime
+
+
+#PredictIt is under maintenance from 04:00 to 05:00 ET. Trades are avoided
+#one minute either side of the window.
+TIMEZONE = 'America/New_York'
+MAINTENANCE_START = datetime.time(hour = 3, minute = 59)
+MAINTENANCE_END = datetime.time(hour = 5, minute = 1)
+
+
+def is_under_maintenance(now = None):
+    '''
+    Desc:
+        Checks whether PI is under maintenance and no trades can occur.
+
+    Params:
+        now (datetime): Time to check, defaults to the current time.
+
+    Returns:
+        under_maintenance (bool)
+
+    '''
+    import pytz #Imported on first use to keep startup light
+    tz = pytz.timezone(TIMEZONE)
+    if now is None:
+        now = datetime.datetime.now(tz)
+    current_eastern_time = now.astimezone(tz)
+    buffered_time = current_eastern_time + datetime.timedelta(minutes = 1) #Prevents trades near maintenance
+    return MAINTENANCE_START <= buffered_time.time() <= MAINTENANCE_END
+
+
+def is_maintenance_minute(minute):
+    '''
+    Desc:
+        Minute-resolution version of is_under_maintenance(), for planning
+        ahead.
+
+    Params:
+        minute (int): ET minute of the day, within [0, 1440).
+
+    Returns:
+        under_maintenance (bool)
+
+    '''
+    buffered = (minute + 1) % 1440 #Prevents trades near maintenance
+    return MAINTENANCE_START <= datetime.time(hour = buffered // 60, minute = buffered % 60) <= MAINTENANCE_END
+
+
+def raise_for_under_maintenance():
+    if is_under_maintenance():
+        raise Exception('PredictIt is currently under maintenance.')
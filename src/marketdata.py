@@ -1,5 +1,6 @@
 import re
 import requests
+from bracketindex import BracketIndex
 
 
 class MarketData:
@@ -10,6 +11,7 @@ class MarketData:
     Typical usage: init() -> (retreive the new polling numbers) -> buy_bracket_selector() 
     
     '''
+    API_URL = 'https://www.predictit.org/api/marketdata/markets/{}'
     
     def __init__(self, market_num):
         '''
@@ -22,12 +24,64 @@ class MarketData:
         
         '''
         assert isinstance(market_num, int)
-        api_url = f'https://www.predictit.org/api/marketdata/markets/{market_num}'
+        api_url = self.API_URL.format(market_num)
         response = requests.get(api_url)
         self.market_num = market_num
-        self.market_data = response.json()
-        self.bracket_bounds = self.get_bracket_bounds()
-        self.raise_for_expired_market()
+        self.contract_key = None
+        self.load(response.json())
+
+    @classmethod
+    def from_dict(cls, market_num, market_data):
+        '''
+        Desc:
+            Builds the market from an already retrieved API response, e.g.
+            a snapshot on disk or data passed to another process.
+
+        Params:
+            market_num (int): PredictIt number assigned to specific market.
+            market_data (dict): Decoded PI marketdata API response.
+
+        '''
+        assert isinstance(market_num, int)
+        market = cls.__new__(cls)
+        market.market_num = market_num
+        market.contract_key = None
+        market.load(market_data)
+        return market
+
+    def load(self, market_data):
+        '''
+        Desc:
+            Takes in a (new) API response. Bracket bounds and the bracket
+            index are only recomputed when the contract list has changed,
+            since price updates leave them untouched.
+
+        Params:
+            market_data (dict): Decoded PI marketdata API response.
+
+        Returns:
+            brackets_changed (bool): Whether the bracket index was rebuilt.
+
+        '''
+        #Checked before anything is replaced, so a failed load keeps the last good data
+        self.raise_for_expired_market(market_data)
+        contract_key = tuple(sorted((con['id'], con['shortName']) for con in market_data['contracts']))
+        brackets_changed = contract_key != self.contract_key
+        previous = getattr(self, 'market_data', None)
+        self.market_data = market_data
+        if brackets_changed:
+            try:
+                bracket_bounds = self.get_bracket_bounds()
+                pollster = self.get_market_pollster()
+                bracket_index = BracketIndex(bracket_bounds, pollster)
+            except Exception:
+                self.market_data = previous
+                raise
+            self.contract_key = contract_key
+            self.bracket_bounds = bracket_bounds
+            self.pollster = pollster
+            self.bracket_index = bracket_index
+        return brackets_changed
 
     def buy_bracket_selector(self, raw_value):
         '''
@@ -48,17 +102,27 @@ class MarketData:
                 Brackets are indexed base 0.
             
         '''
-        #RCP polling values are NOT single value. Must convert.
-        if self.get_market_pollster().lower() == 'rcp':    
-            spread = self.rcp_value_interpreter(raw_value)
-        else:
-            spread = raw_value
-        target_bracket = 0
-        for bound in self.bracket_bounds:
-            if (spread < bound):
-                return target_bracket
-            target_bracket += 1        
-        
+        #RCP polling values are NOT single value. The index converts them.
+        return self.bracket_index.classify(raw_value)
+
+    def buy_bracket_selector_many(self, raw_values, leaders = None):
+        '''
+        Desc:
+            Batch version of buy_bracket_selector() for historical or
+            simulated values. See BracketIndex.classify_many().
+
+        Params:
+            raw_values (array-like): Poll values, or (leader, spread) pairs
+                for RCP markets.
+            leaders (array-like of str): Optional RCP leaders matching raw_values.
+
+        Returns:
+            target_brackets (numpy int array): Bracket index of every value.
+                BracketIndex.NO_BRACKET for values above every bound.
+
+        '''
+        return self.bracket_index.classify_many(raw_values, leaders)
+
     def get_bracket_bounds(self):
         '''
         Desc:
@@ -73,15 +137,32 @@ class MarketData:
         contracts = self.market_data['contracts']
         bracket_bounds = []
         for con in contracts:
-            #Bracket values must contain a decimal
-            upper_bound = re.search('\d+\.\d+', con['shortName']).group()
-            upper_bound = round(float(upper_bound), 1)
+            upper_bound = self.contract_bound(con)
             bracket_bounds.append(upper_bound)
         bracket_bounds.sort()
         del bracket_bounds[0]
         bracket_bounds.append(999) #Arbitrarily large upper bound
         return bracket_bounds
                 
+    @staticmethod
+    def contract_bound(con):
+        #Bracket values must contain a decimal
+        bound = re.search('\d+\.\d+', con['shortName']).group()
+        return round(float(bound), 1)
+
+    def get_contract_ids(self):
+        '''
+        Desc:
+            Retreives the contract IDs in bracket order.
+
+        Returns:
+            contract_ids (list of ints): contract_ids[i] is the PredictIt
+                contract ID of bracket i.
+
+        '''
+        contracts = sorted(self.market_data['contracts'], key = self.contract_bound)
+        return [con['id'] for con in contracts]
+
     def rcp_value_interpreter(self, raw_rcp):
         '''
         Desc:
@@ -97,15 +178,7 @@ class MarketData:
             spread (num): Converted single value which can be used to identify a bracket.
             
         '''
-        leader = raw_rcp[0]
-        spread = raw_rcp[1]
-        if (spread < 0) or (spread > 20): #Checks for unexpected avg
-            raise Exception('RCP average is bad. It is {}'.format(spread))
-        if (leader.lower() == 'trump'): #Bracket ranges are relative to Trump
-            spread *= -1.0
-        elif (leader.lower() != 'biden'):
-            raise Exception("Current leader is unknown. It is {}".format(leader.lower))
-        return spread
+        return self.bracket_index.rcp_spread(raw_rcp)
 
     def get_market_pollster(self):
         mkt_name = self.market_data['name']
@@ -115,7 +188,9 @@ class MarketData:
                 return p
         raise Exception(f"The pollster: '{mkt_name}', is not recognized.")
     
-    def raise_for_expired_market(self):
-        if 'close' in self.market_data['status'].lower():
+    def raise_for_expired_market(self, market_data = None):
+        if market_data is None:
+            market_data = self.market_data
+        if 'close' in market_data['status'].lower():
             raise Exception('This market is expired.')
             
\ No newline at end of file
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import time
+
+
+class Histogram:
+    '''
+    HDR-style histogram of durations. Values are recorded in microseconds
+    into log-linear buckets, 2 ** (SUB_BUCKET_BITS - 1) per power of two,
+    which keeps the relative error near 3% at any magnitude. Recording is
+    a few integer operations and a list increment.
+
+    '''
+    SUB_BUCKET_BITS = 6
+    MAX_SHIFT = 40 #Enough for durations of several days
+
+    def __init__(self, name):
+        self.name = name
+        self.sub_buckets = 1 << self.SUB_BUCKET_BITS
+        self.half = self.SUB_BUCKET_BITS - 1
+        self.counts = [0] * ((self.MAX_SHIFT + 2) << self.half)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def bucket_index(self, micros):
+        if micros < self.sub_buckets:
+            return micros
+        shift = micros.bit_length() - self.SUB_BUCKET_BITS
+        return (shift << self.half) + (micros >> shift)
+
+    def bucket_value(self, index):
+        '''
+        Desc:
+            Midpoint of a bucket, in microseconds.
+
+        '''
+        if index < self.sub_buckets:
+            return index
+        shift = (index >> self.half) - 1
+        low = (index - (shift << self.half)) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, seconds):
+        micros = int(seconds * 1e6)
+        if micros < 0:
+            micros = 0
+        self.counts[self.bucket_index(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        if (self.min is None) or (seconds < self.min):
+            self.min = seconds
+        if (self.max is None) or (seconds > self.max):
+            self.max = seconds
+
+    def percentile(self, percent):
+        '''
+        Desc:
+            Value at the given percentile, in seconds. None if empty.
+
+        Params:
+            percent (float): Within [0, 100].
+
+        '''
+        if self.count == 0:
+            return None
+        target = max(1, round(self.count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.max, max(self.min, self.bucket_value(index) / 1e6))
+        return self.max
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class Metrics:
+    '''
+    Registry of latency histograms and labelled counters, cheap enough to
+    feed from the checking bots' hot path. Exporting is left to sinks,
+    callables that receive the registry and are run by flush().
+
+    Typical usage: init() -> record() / increment() -> flush() or report_periodically()
+
+    '''
+    QUANTILES = (50, 90, 99)
+
+    def __init__(self, sinks = None):
+        self.histograms = {}
+        self.counters = {} #name -> {labels tuple -> count}
+        self.sinks = list(sinks or [])
+        self.started = time.time()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = Histogram(name)
+            self.histograms[name] = histogram
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def increment(self, name, amount = 1, **labels):
+        counter = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        counter[key] = counter.get(key, 0) + amount
+
+    def flush(self):
+        for sink in self.sinks:
+            sink(self)
+
+    async def report_periodically(self, interval):
+        '''
+        Desc:
+            Runs the sinks every interval seconds until cancelled.
+
+        '''
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    def summary_line(self):
+        parts = []
+        for name, histogram in self.histograms.items():
+            if histogram.count == 0:
+                continue
+            parts.append(f'{name}: n={histogram.count} p50={histogram.percentile(50) * 1e3:.1f}ms '
+                         f'p99={histogram.percentile(99) * 1e3:.1f}ms')
+        for name, counter in self.counters.items():
+            parts.append(f'{name}: {sum(counter.values())}')
+        return '\t '.join(parts)
+
+    def to_prometheus(self, prefix = 'pitrader'):
+        '''
+        Desc:
+            Dumps the registry in the Prometheus text exposition format.
+            Histograms are exported as summaries.
+
+        Returns:
+            text (str)
+
+        '''
+        lines = []
+        for name, histogram in self.histograms.items():
+            metric = f'{prefix}_{name}_seconds'
+            lines.append(f'# TYPE {metric} summary')
+            if histogram.count:
+                for quantile in self.QUANTILES:
+                    lines.append(f'{metric}{{quantile="{quantile / 100}"}} {histogram.percentile(quantile)}')
+            lines.append(f'{metric}_sum {histogram.total}')
+            lines.append(f'{metric}_count {histogram.count}')
+        for name, counter in self.counters.items():
+            metric = f'{prefix}_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for key, count in counter.items():
+                labels = ','.join(f'{label}="{value}"' for label, value in key)
+                lines.append(f'{metric}{{{labels}}} {count}' if labels else f'{metric} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        return {
+            'timestamp': time.time(),
+            'uptime': time.time() - self.started,
+            'histograms': {name: h.snapshot() for name, h in self.histograms.items()},
+            'counters': {name: [dict(key, count = count) for key, count in counter.items()]
+                         for name, counter in self.counters.items()},
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+
+class PrintSink:
+    '''
+    Prints the summary line of the registry.
+
+    '''
+    def __call__(self, metrics):
+        print(metrics.summary_line())
+
+
+class FileSink:
+    '''
+    Overwrites a file with the latest Prometheus text dump or JSON snapshot,
+    e.g. for a node exporter textfile collector.
+
+    '''
+    def __init__(self, path, fmt = 'prometheus'):
+        assert fmt in ('prometheus', 'json'), 'Format must be prometheus or json.'
+        self.path = path
+        self.fmt = fmt
+
+    def __call__(self, metrics):
+        text = metrics.to_prometheus() if self.fmt == 'prometheus' else metrics.to_json()
+        with open(self.path, 'w') as f:
+            f.write(text)
@@ -0,0 +1,163 @@
+import time
+import asyncio
+from collections import namedtuple
+from marketdata import MarketData
+from pollchecker import PollChecker
+
+
+MarketChange = namedtuple('MarketChange', ['market_num', 'old_bracket', 'new_bracket', 'raw_value', 'timestamp'])
+
+
+class MultiMarketChecker:
+    '''
+    Watches several markets at once. Markets are grouped by pollster and each
+    poll source is fetched once per check, with the value fanned out to every
+    market's bracket index. Request volume grows with the number of sources,
+    not the number of markets.
+
+    The most common usage is: init() -> async_script()
+
+    '''
+    def __init__(self, market_nums, proxy_username = None, proxy_password = None, num_bots = None,
+                 request_rate = None, jitter = 0.0, pool_size = None, checker_kwargs = None):
+        '''
+        Desc:
+            Retrieves the market data of every market and sets up one
+            PollChecker per poll source.
+
+        Params:
+            market_nums (list of ints): PredictIt numbers of the markets to watch.
+            proxy_username (str): Username for proxy service.
+            proxy_password (str): Password for proxy service.
+            num_bots (int): Number of poll checking bots per source.
+            request_rate (float): Target requests per second per source.
+                See PollChecker.
+            jitter (float): See PollChecker.
+            pool_size (int): Proxy sessions per source. See PollChecker.
+            checker_kwargs (dict): Extra PollChecker arguments per source,
+                e.g. {'fte': {'store': ObservationStore(), 'report_interval': 5}}.
+
+        '''
+        if num_bots is None:
+            num_bots = int(input("How many checking bots to use per source? "))
+        if proxy_username is None:
+            proxy_username = input("Username for proxy service? ")
+        if proxy_password is None:
+            proxy_password = input("Password for proxy service? ")
+        self.markets = {}
+        self.groups = {} #pollster -> list of MarketData
+        for market_num in market_nums:
+            market = MarketData(market_num)
+            self.markets[market_num] = market
+            self.groups.setdefault(market.pollster, []).append(market)
+        self.checkers = {}
+        checker_kwargs = checker_kwargs or {}
+        for pollster, markets in self.groups.items():
+            self.checkers[pollster] = PollChecker(markets[0].market_num, proxy_username, proxy_password, num_bots,
+                                                  request_rate, jitter, market = markets[0], pool_size = pool_size,
+                                                  **checker_kwargs.get(pollster, {}))
+        self.num_bots = num_bots
+        self.reference_values = {} #pollster -> latest value
+        self.reference_started = {} #pollster -> request start of the latest value
+        self.reference_brackets = {} #market_num -> latest bracket
+
+    def fan_out(self, pollster, current_value, started):
+        '''
+        Desc:
+            Classifies a freshly fetched value for every market of the
+            pollster. Responses to requests started before the one that
+            set the current reference are ignored, so a slow bot cannot
+            report an outdated value as a change.
+
+        Params:
+            pollster (str): Source the value was fetched from.
+            current_value (multiple types): Fetched poll value.
+            started (float): time.time() when the request was made.
+
+        Returns:
+            changes (list of MarketChange): One event per market whose
+                bracket moved.
+
+        '''
+        if started < self.reference_started.get(pollster, 0):
+            return []
+        self.reference_started[pollster] = started
+        if self.reference_values.get(pollster) == current_value:
+            return []
+        is_first = pollster not in self.reference_values
+        self.reference_values[pollster] = current_value
+        changes = []
+        now = time.time()
+        for market in self.groups[pollster]:
+            new_bracket = market.buy_bracket_selector(current_value)
+            old_bracket = self.reference_brackets.get(market.market_num)
+            self.reference_brackets[market.market_num] = new_bracket
+            if (not is_first) and (new_bracket != old_bracket):
+                changes.append(MarketChange(market.market_num, old_bracket, new_bracket, current_value, now))
+        return changes
+
+    async def detect_change_routine(self, identification, pollster, session):
+        '''
+        Desc:
+            Poll checking bot for one source. Runs until any market of the
+            source changes bracket.
+
+        Params:
+            identification (int): The ID of the poll checking bot.
+            pollster (str): Source to check.
+            session (aiohttp ClientSession): Persistent http session.
+
+        Returns:
+            changes (list of MarketChange)
+
+        '''
+        checker = self.checkers[pollster]
+        while (True):
+            try:
+                current_value, started = await checker.check(identification, session)
+            except asyncio.CancelledError:
+                return None
+            changes = self.fan_out(pollster, current_value, started)
+            if changes:
+                print('----------CHANGE DETECTED----------')
+                return changes
+
+    async def detect_change(self):
+        '''
+        Desc:
+            Runs num_bots bots per source until a bracket change is detected
+            in any market.
+
+        Returns:
+            changes (list of MarketChange): Every market whose bracket moved.
+
+        '''
+        async with PollChecker.make_session() as session:
+            for checker in self.checkers.values():
+                if checker.proxy_pool is not None:
+                    await checker.proxy_pool.start(session, checker.poll_url())
+            bots = [asyncio.ensure_future(self.detect_change_routine(i, pollster, session))
+                    for pollster in self.checkers for i in range(self.num_bots)]
+            background = {pollster: checker.start_background() for pollster, checker in self.checkers.items()}
+            try:
+                completed, futures = await asyncio.wait(bots, return_when = asyncio.FIRST_COMPLETED)
+            finally:
+                for each in bots:
+                    each.cancel()
+                for pollster, checker in self.checkers.items():
+                    checker.stop_background(background[pollster])
+            for each in completed:
+                return each.result()
+
+    def async_script(self):
+        '''
+        Desc:
+            Wrapper for the entire async routine. Reference values are kept
+            between calls, so a repeated call reports changes relative to
+            the last detection.
+
+        Returns:
+            changes (list of MarketChange): Every market whose bracket moved.
+
+        '''
+        return asyncio.run(self.detect_change())
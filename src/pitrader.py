@@ -1,8 +1,47 @@
-from selenium.webdriver.chrome.options import Options
-from selenium import webdriver
+import base64
+import json
 import time
-import pytz
-import datetime
+import threading
+import maintenance
+
+
+#Fills the purchase form in one WebDriver round trip. The native value setter
+#and input events are used so the page's framework sees the typed values.
+FILL_ORDER_SCRIPT = '''
+    function setValue(input, value) {
+        var setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+        setter.call(input, value);
+        input.dispatchEvent(new Event('input', {bubbles: true}));
+        input.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+    var price = document.getElementsByClassName('purchase-offer-value__input')[0];
+    var quantity = document.getElementsByClassName('purchase-quantity-value__input')[0];
+    var tick = document.getElementsByClassName('checkbox__tick')[0];
+    var button = document.getElementsByClassName('purchase-offer-desktop__footer-next-button')[0];
+    if (!(price && quantity && tick && button)) {
+        return null;
+    }
+    setValue(price, String(arguments[0]));
+    setValue(quantity, String(arguments[1]));
+    tick.click();
+    return button;
+'''
+
+
+class ArmedOrder:
+    '''
+    An order prepared ahead of time in its own browser tab, waiting for a
+    single click.
+
+    '''
+    def __init__(self, handle, order_button, bracket_num, quantity, is_yes, limit_price = 90):
+        self.handle = handle
+        self.order_button = order_button
+        self.bracket_num = bracket_num
+        self.quantity = quantity
+        self.is_yes = is_yes
+        self.limit_price = limit_price
+        self.armed_at = time.time()
 
 
 class PiTrader:
@@ -11,10 +50,21 @@ class PiTrader:
     purchases.
     
     Typical usage: prepare_a_purchase() --> execute_order() --> close() (must conduct in this order)
+    Pre-armed usage: arm_orders() --> execute_armed_order() --> close()
+    Saved session usage: init(session_path = ...) restores the last session
+    on later starts instead of logging in again.
     
     '''
     
-    def __init__(self, market_num):
+    MARKET_URL = 'https://www.predictit.org/markets/detail/{}'
+    SESSION_CHECK_PATH = '/api/User/Wallet/Balance' #Small authorized request
+    AUTH_COOKIES = ('session', '.ASPXAUTH', '.AspNet.ApplicationCookie') #Cookies that hold the login
+    SESSION_LIFETIME = 12 * 3600 #Assumed if neither the auth cookie nor the token states its expiry
+
+    def __init__(self, market_num, email = None, password = None,
+                 chromedriver_path = r"chromedriver_win32\chromedriver.exe", headless_mode = True, metrics = None,
+                 launch = True, session_path = None, refresh_margin = 3600, keep_alive_interval = 60,
+                 scripted_input = False):
         '''
         Desc:
             Checks if PredictIt is under maintenance. If not, the bot logs in
@@ -22,17 +72,62 @@ class PiTrader:
             
         Params:
             market_num (int): PredictIt number assigned to specific market.
+            email (str): PredictIt login. Prompted for if None.
+            password (str): PredictIt password. Prompted for if None.
+            chromedriver_path (str): Path to the chromedriver executable.
+            headless_mode (bool): Run Chrome without a window. Set to False
+                to watch the workflow while debugging.
+            metrics (Metrics): If given, detection-to-order latencies are
+                recorded into it, e.g. the PollChecker's registry.
+            launch (bool): Set to False to defer the browser launch and
+                login, e.g. to run them in a thread alongside other
+                startup work. Call start_browser() and login() later.
+            session_path (str): If given, the logged-in session is saved
+                there, encrypted with the password, and restored on later
+                starts, skipping the login flow while it is valid.
+            refresh_margin (float): Seconds before the saved session
+                expires that a new one is logged into in the background.
+            keep_alive_interval (float): Seconds between expiry checks.
+            scripted_input (bool): Fill the purchase form with one script
+                call instead of typing into it key by key. Off until the
+                script is proven on the live market page, see bench_dom.py.
         
         '''
         assert isinstance(market_num, int)
         self.raise_for_under_maintenance()
-        self.market_url = f'https://www.predictit.org/markets/detail/{market_num}'
+        self.market_url = self.MARKET_URL.format(market_num)
+        self.chromedriver_path = chromedriver_path
+        self.headless_mode = headless_mode
+        self.metrics = metrics
         self.order_button = None
         self.order_is_ready = False
+        self.armed_orders = {} #(bracket_num, is_yes) -> ArmedOrder
+        self.spent_handles = [] #Tabs of executed armed orders
+        self.order_latencies = [] #Seconds from detection to click
+        self.driver_lock = threading.Lock() #WebDriver is not thread safe
+        self.refresh_thread = None
+        self.stop_refreshing = threading.Event()
+        self.driver = None
+        self.main_handle = None
+        self.session_path = session_path
+        self.session_store = None
+        self.session_expires_at = None
+        self.refresh_margin = refresh_margin
+        self.keep_alive_interval = keep_alive_interval
+        self.keep_alive_thread = None
+        self.stop_keeping_alive = threading.Event()
+        self.credentials = None
+        self.scripted_input = scripted_input
+        self.elements = {} #(window handle, name) -> element(s) found before
+        self.current_handle = None
+        if launch:
+            self.start_browser()
+            self.login(email, password)
+
+    def start_browser(self):
         self.driver = self.HeadlessDriver()
-        self.login()
 
-    def prepare_a_purchase(self, bracket_num, quantity, is_yes):
+    def prepare_a_purchase(self, bracket_num, quantity, is_yes, limit_price = 90):
         '''
         Desc:
             Wrapper function. 
@@ -44,33 +139,255 @@ class PiTrader:
             bracket_num (int): Bracket to purchase shares from. Top to bottom, 0 -> 8.
             quantity (int): Number of shares to purchase.
             is_yes (bool): Indicate purchase of YES shares or NO shares.
+            limit_price (int): Highest price paid per share, in cents.
 
         '''
         self.select_contract(bracket_num, is_yes)
         time.sleep(0.1)
-        self.enter_buy_info(quantity)
+        self.enter_buy_info(quantity, limit_price)
         self.describe_order(bracket_num, quantity, is_yes)
         self.order_is_ready = True
 
-    def execute_order(self):
+    def execute_order(self, detected_at = None):
         '''
         Desc:
             Executes a prepared order.
             Throws exception if order_is_ready = False.
 
+        Params:
+            detected_at (float): time.time() of the change detection. If
+                given, the time from detection to click is recorded.
+
         '''
         assert self.order_is_ready, 'Order is not prepared.'
         self.order_button.click()
-        print(f'ORDER EXECUTED. Time is: {time.localtime()}')
+        clicked_at = time.time()
+        print(f'ORDER EXECUTED. Time is: {time.localtime(clicked_at)}')
         self.order_is_ready = False
+        if detected_at is not None:
+            self.record_latency(clicked_at - detected_at)
         
+    def arm_orders(self, current_bracket, quantity, reach = 1, refresh_interval = None, limit_price = 90):
+        '''
+        Desc:
+            Prepares the likely target orders ahead of a change, each in its
+            own tab holding a ready order button. Targets are YES and NO
+            on every bracket within reach of the current one. Once the new
+            bracket is known, execute_armed_order() only switches to the
+            tab and clicks.
+
+        Params:
+            current_bracket (int): Bracket the polling value is in now.
+            quantity (int): Number of shares per order.
+            reach (int): How many brackets on each side to arm.
+            refresh_interval (float): If given, seconds between background
+                refreshes of the armed orders so they do not go stale.
+            limit_price (int): Highest price paid per share, in cents.
+
+        '''
+        from selenium.webdriver.common.by import By
+        assert isinstance(current_bracket, int)
+        self.disarm_orders()
+        with self.driver_lock:
+            num_brackets = len(self.driver.find_elements(By.CLASS_NAME, 'market-contract-horizontal-v2__button-single')) // 2
+            for bracket_num in range(current_bracket - reach, current_bracket + reach + 1):
+                if (bracket_num == current_bracket) or (bracket_num < 0) or (bracket_num >= num_brackets):
+                    continue
+                for is_yes in (True, False):
+                    self.driver.execute_script('window.open();')
+                    handle = self.driver.window_handles[-1]
+                    self.switch_to(handle)
+                    self.driver.get(self.market_url)
+                    order = ArmedOrder(handle, None, bracket_num, quantity, is_yes, limit_price)
+                    self.arm_order(order)
+                    self.armed_orders[(bracket_num, is_yes)] = order
+            self.switch_to(self.main_handle)
+        print(f'Armed {len(self.armed_orders)} orders around bracket {current_bracket}.')
+        if refresh_interval is not None:
+            self.start_refreshing(refresh_interval)
+
+    def arm_order(self, order):
+        '''
+        Desc:
+            Fills in an order in the current tab and stores its order button.
+            Caller must hold driver_lock and have switched to the order's tab.
+
+        '''
+        self.select_contract(order.bracket_num, order.is_yes)
+        time.sleep(0.1)
+        self.enter_buy_info(order.quantity, order.limit_price)
+        order.order_button = self.order_button
+        order.armed_at = time.time()
+        self.order_button = None
+
+    def refresh_armed_orders(self):
+        '''
+        Desc:
+            Reloads every armed tab and prepares its order again. The lock is
+            released between tabs so an execution never waits for more than
+            one tab's refresh.
+
+        '''
+        for key in list(self.armed_orders):
+            with self.driver_lock:
+                order = self.armed_orders.get(key)
+                if order is None:
+                    continue
+                self.switch_to(order.handle)
+                self.driver.refresh()
+                self.arm_order(order)
+                self.switch_to(self.main_handle)
+
+    def start_refreshing(self, refresh_interval):
+        self.stop_refreshing.clear()
+        def refresh_loop():
+            while not self.stop_refreshing.wait(refresh_interval):
+                try:
+                    self.refresh_armed_orders()
+                except Exception as e:
+                    print(f'Caught error while refreshing armed orders: {repr(e)}')
+        self.refresh_thread = threading.Thread(target = refresh_loop, daemon = True)
+        self.refresh_thread.start()
+
+    def execute_armed_order(self, bracket_num, is_yes, detected_at = None):
+        '''
+        Desc:
+            Executes an order prepared by arm_orders(). The order is a
+            dictionary lookup, a tab switch and one click.
+            Throws exception if no order was armed for the bracket.
+
+        Params:
+            bracket_num (int): Bracket to purchase shares from.
+            is_yes (bool): Indicate purchase of YES shares or NO shares.
+            detected_at (float): time.time() of the change detection. If
+                given, the time from detection to click is recorded in
+                order_latencies.
+
+        Returns:
+            latency (float): Seconds from detection to click, or None.
+
+        '''
+        with self.driver_lock:
+            order = self.armed_orders.pop((bracket_num, is_yes), None)
+            assert order is not None, f'No order armed for bracket {bracket_num}.'
+            self.switch_to(order.handle)
+            order.order_button.click()
+            self.spent_handles.append(order.handle)
+        clicked_at = time.time()
+        print(f'ARMED ORDER EXECUTED. Time is: {time.localtime(clicked_at)}')
+        if detected_at is None:
+            return None
+        return self.record_latency(clicked_at - detected_at)
+
+    def record_latency(self, latency):
+        self.order_latencies.append(latency)
+        if self.metrics is not None:
+            self.metrics.record('detection_to_order', latency)
+        return latency
+
+    def disarm_orders(self):
+        '''
+        Desc:
+            Stops the refresh timer and closes every armed tab.
+
+        '''
+        self.stop_refreshing.set()
+        if self.refresh_thread is not None:
+            self.refresh_thread.join()
+            self.refresh_thread = None
+        with self.driver_lock:
+            for handle in [order.handle for order in self.armed_orders.values()] + self.spent_handles:
+                self.switch_to(handle)
+                self.driver.close()
+                self.forget_elements(handle)
+            self.armed_orders = {}
+            self.spent_handles = []
+            if self.main_handle is not None:
+                self.switch_to(self.main_handle)
+
+    def switch_to(self, handle):
+        self.driver.switch_to.window(handle)
+        self.current_handle = handle
+
+    def cached_element(self, name, locate, action):
+        '''
+        Desc:
+            Runs action on an element found earlier in the current tab,
+            locating it only on first use. An element gone stale, e.g.
+            after the page re-rendered, or a list too short for the action
+            is located again once. Nothing is cached while the page has
+            not rendered the element yet, so the next call looks again.
+
+        Params:
+            name (str): Cache key within the tab.
+            locate (function): Finds the element(s) through the driver.
+            action (function): action(element), the WebDriver calls to make.
+
+        Returns:
+            result: What action returned.
+
+        '''
+        from selenium.common.exceptions import StaleElementReferenceException
+        key = (self.current_handle, name)
+        is_fresh = key not in self.elements
+        element = self.locate_element(key, locate) if is_fresh else self.elements[key]
+        try:
+            return action(element)
+        except (StaleElementReferenceException, IndexError):
+            if is_fresh:
+                self.elements.pop(key, None)
+                raise
+        element = self.locate_element(key, locate)
+        try:
+            return action(element)
+        except (StaleElementReferenceException, IndexError):
+            self.elements.pop(key, None)
+            raise
+
+    def locate_element(self, key, locate):
+        element = locate()
+        if isinstance(element, list) and not element:
+            self.elements.pop(key, None) #Not rendered yet
+        else:
+            self.elements[key] = element
+        return element
+
+    def forget_elements(self, handle):
+        for key in [key for key in self.elements if key[0] == handle]:
+            del self.elements[key]
+
+    def is_alive(self):
+        '''
+        Desc:
+            Whether the browser still responds and has not been sent back
+            to the login page.
+
+        '''
+        try:
+            return 'login' not in self.driver.current_url.lower()
+        except Exception:
+            return False
+
     def close(self):
-        self.driver.quit()
+        '''
+        Desc:
+            Stops the background threads, then quits the browser. A thread
+            still busy after the timeout at least finishes its current
+            driver call first, as quitting waits for driver_lock.
+
+        '''
+        self.stop_refreshing.set()
+        self.stop_keeping_alive.set()
+        for thread in (self.refresh_thread, self.keep_alive_thread):
+            if thread is not None:
+                thread.join(timeout = 10)
+        with self.driver_lock:
+            self.driver.quit()
         
     def save_screenshot(self, filename):
         self.driver.save_screenshot(filename)
         
-    def enter_buy_info(self, quantity):
+    def enter_buy_info(self, quantity, limit_price = 90):
         '''
         Desc:
             Enter final purchasing details (quantity and price).
@@ -79,20 +396,28 @@ class PiTrader:
         
         Params:
             quantity (int): Number of shares to purchase.
+            limit_price (int): Highest price paid per share, in cents.
             
         '''
         assert isinstance(quantity, int)
-        limit_price = 90 #Pay up to 90 cents per share
-        price_box = self.driver.find_element_by_class_name('purchase-offer-value__input')
-        price_box.clear()
-        price_box.send_keys(limit_price)
-        quantity_box = self.driver.find_element_by_class_name('purchase-quantity-value__input')
-        quantity_box.clear()
-        quantity_box.send_keys(quantity)
-        check_box = self.driver.find_element_by_class_name('checkbox__tick')
-        check_box.click()
-        order_button = self.driver.find_element_by_class_name('purchase-offer-desktop__footer-next-button')
-        self.order_button = order_button 
+        if self.scripted_input:
+            order_button = self.driver.execute_script(FILL_ORDER_SCRIPT, limit_price, quantity)
+            if order_button is None:
+                raise Exception('Purchase form not found.')
+            self.order_button = order_button
+            return
+        def type_into(box, keys):
+            box.clear()
+            box.send_keys(keys)
+        from selenium.webdriver.common.by import By
+        find = lambda class_name: self.driver.find_element(By.CLASS_NAME, class_name)
+        self.cached_element('price_box', lambda: find('purchase-offer-value__input'),
+                            lambda box: type_into(box, limit_price))
+        self.cached_element('quantity_box', lambda: find('purchase-quantity-value__input'),
+                            lambda box: type_into(box, quantity))
+        self.cached_element('check_box', lambda: find('checkbox__tick'), lambda box: box.click())
+        #Located fresh, a cached button could only be found stale at the click
+        self.order_button = find('purchase-offer-desktop__footer-next-button')
         
     def raise_for_under_maintenance(self):
         '''
@@ -101,13 +426,7 @@ class PiTrader:
             Assumes that maintenance time is 04:00 - 05:00 ET.
 
         '''
-        tz = pytz.timezone('America/New_York')    
-        current_eastern_time = datetime.datetime.now(tz)
-        buffered_time = current_eastern_time + datetime.timedelta(minutes = 1) #Prevents trades near maintenance
-        maintenance_start_time = buffered_time.replace(hour = 3, minute = 59, second = 0) 
-        maintenance_end_time = buffered_time.replace(hour = 5, minute = 1, second = 0)
-        if (buffered_time >= maintenance_start_time) and (buffered_time <= maintenance_end_time):
-            raise Exception('PredictIt is currently under maintenance.')
+        maintenance.raise_for_under_maintenance()
      
     def describe_order(self, bracket_num, quantity, is_yes):
         s = 'NO'
@@ -124,32 +443,216 @@ class PiTrader:
         Returns:
             driver (chromedriver): webdriver for trading
         '''
+        from selenium import webdriver #Imported on first use to keep startup light
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
         chrome_options = Options()
-        chrome_options.add_argument('--headless')
+        if self.headless_mode:
+            chrome_options.add_argument('--headless')
         chrome_options.add_argument('--window-size=1920x1080')
-        driver = webdriver.Chrome(options = chrome_options, executable_path = r"chromedriver_win32\chromedriver.exe")
+        driver = webdriver.Chrome(service = Service(self.chromedriver_path), options = chrome_options)
         return driver
     
-    def login(self):
+    def login(self, email = None, password = None):
         '''
         Desc:
             Logs into PI and navigates to the market page.
-            Prompts user for login info.
+            Prompts user for login info that was not passed in.
+            With a session_path, a saved session is restored instead if
+            it still works, and a fresh one is saved after a login.
+
+        Params:
+            email (str): PredictIt login.
+            password (str): PredictIt password.
 
         '''
-        self.driver.get(self.market_url)
+        if email is None:
+            email = input("Enter your PredictIt login: ")
+        if password is None:
+            password = input("Enter your PredictIt password: ")
+        if self.session_path is None:
+            self.log_in(email, password)
+        else:
+            from sessionstore import SessionStore
+            self.session_store = SessionStore(self.session_path, password)
+            self.credentials = (email, password) #Kept for the background refresh
+            if self.restore_session():
+                print('Restored saved PredictIt session.')
+            else:
+                self.log_in(email, password)
+                self.save_session()
+            self.start_keeping_alive()
+        self.main_handle = self.driver.current_window_handle
+        self.current_handle = self.main_handle
+
+    def log_in(self, email, password, driver = None):
+        '''
+        Desc:
+            The full login flow through the market page's login form.
+
+        Params:
+            driver (chromedriver): Browser to log in, the trader's if None.
+
+        '''
+        from selenium.webdriver.common.by import By
+        driver = driver or self.driver
+        driver.get(self.market_url)
         time.sleep(0.1)
-        login_button = self.driver.find_element_by_id('login')
+        login_button = driver.find_element(By.ID, 'login')
         login_button.click()   
-        email_box = self.driver.find_element_by_id('username')
-        user_login = input("Enter your PredictIt login: ")
-        email_box.send_keys(user_login)
-        pw_box = self.driver.find_element_by_id('password')
-        user_pw = input("Enter your PredictIt password: ")
-        pw_box.send_keys(user_pw)
-        submit_button = self.driver.find_element_by_xpath("//button[@type='submit']")
+        email_box = driver.find_element(By.ID, 'username')
+        email_box.send_keys(email)
+        pw_box = driver.find_element(By.ID, 'password')
+        pw_box.send_keys(password)
+        submit_button = driver.find_element(By.XPATH, "//button[@type='submit']")
         submit_button.click()
         time.sleep(1)
+
+    def session_is_valid(self, driver = None):
+        '''
+        Desc:
+            Checks the browser's session with one small authorized request
+            from the current page.
+
+        Params:
+            driver (chromedriver): Browser to check, the trader's if None.
+
+        '''
+        status = (driver or self.driver).execute_async_script('''
+            var done = arguments[arguments.length - 1];
+            fetch(arguments[0], {credentials: 'same-origin',
+                                 headers: {'Authorization': 'Bearer ' + localStorage.getItem('token')}})
+                .then(function (r) { done(r.status); }, function () { done(0); });
+        ''', self.site_url() + self.SESSION_CHECK_PATH)
+        return status == 200
+
+    def site_url(self):
+        return self.market_url[:self.market_url.index('/markets/')]
+
+    def restore_session(self):
+        '''
+        Desc:
+            Loads the saved cookies and local storage into the browser and
+            opens the market page.
+
+        Returns:
+            is_restored (bool): False if there is no saved session or it no
+                longer works, in which case a login is needed.
+
+        '''
+        session = self.session_store.load()
+        if session is None:
+            return False
+        #Cookies can only be set on a page of their domain
+        self.driver.get(self.site_url() + '/favicon.ico')
+        self.load_session(session['cookies'], session['local_storage'])
+        self.driver.get(self.market_url)
+        if not self.session_is_valid():
+            self.clear_session()
+            return False
+        self.session_expires_at = session['expires_at']
+        return True
+
+    def load_session(self, cookies, local_storage):
+        '''
+        Desc:
+            Puts cookies and local storage into the browser. The current
+            tab must be on the site.
+
+        '''
+        for cookie in cookies:
+            self.driver.add_cookie(cookie)
+        self.driver.execute_script('''
+            for (var key in arguments[0]) { localStorage.setItem(key, arguments[0][key]); }
+        ''', local_storage)
+
+    def read_session(self, driver = None):
+        driver = driver or self.driver
+        return driver.get_cookies(), driver.execute_script('return Object.assign({}, localStorage);')
+
+    def session_expiry(self, cookies, local_storage):
+        '''
+        Desc:
+            When the login runs out, from the auth cookie or else the
+            expiry claim of a JWT bearer token. Other cookies, e.g.
+            short-lived analytics ones, say nothing about the login.
+
+        Returns:
+            expires_at (float): time.time() the session stops working.
+
+        '''
+        expiries = [cookie['expiry'] for cookie in cookies
+                    if (cookie['name'] in self.AUTH_COOKIES) and ('expiry' in cookie)]
+        if expiries:
+            return min(expiries)
+        token = local_storage.get('token') or ''
+        if token.count('.') == 2:
+            try:
+                payload = token.split('.')[1]
+                claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+                return float(claims['exp'])
+            except (ValueError, KeyError, TypeError):
+                pass
+        return time.time() + self.SESSION_LIFETIME
+
+    def save_session(self, cookies = None, local_storage = None):
+        '''
+        Desc:
+            Saves the given session, or the browser's if None.
+
+        '''
+        if cookies is None:
+            cookies, local_storage = self.read_session()
+        self.session_expires_at = self.session_expiry(cookies, local_storage)
+        self.session_store.save(cookies, local_storage, self.session_expires_at)
+
+    def clear_session(self):
+        self.session_store.clear()
+        self.driver.delete_all_cookies()
+        self.driver.execute_script('localStorage.clear();')
+
+    def refresh_session(self):
+        '''
+        Desc:
+            Logs into a new session in a separate browser and, once it is
+            confirmed to work, moves it into the trader's browser and saves
+            it. The current session stays untouched if the login fails, and
+            no tab is reloaded, so prepared and armed orders are kept.
+
+        '''
+        driver = self.HeadlessDriver()
+        try:
+            self.log_in(*self.credentials, driver = driver)
+            if not self.session_is_valid(driver):
+                raise Exception('New PredictIt session failed the session check.')
+            cookies, local_storage = self.read_session(driver)
+        finally:
+            driver.quit()
+        with self.driver_lock:
+            self.load_session(cookies, local_storage) #Tabs share cookies and storage, any tab will do
+        self.save_session(cookies, local_storage)
+        print('Refreshed PredictIt session.')
+
+    def start_keeping_alive(self):
+        '''
+        Desc:
+            Starts a background thread that logs into a new session once
+            the saved one is within refresh_margin of expiring.
+
+        '''
+        if self.keep_alive_thread is not None:
+            return
+        self.stop_keeping_alive.clear()
+        def keep_alive_loop():
+            while not self.stop_keeping_alive.wait(self.keep_alive_interval):
+                if time.time() < self.session_expires_at - self.refresh_margin:
+                    continue
+                try:
+                    self.refresh_session()
+                except Exception as e:
+                    print(f'Caught error while refreshing the session: {repr(e)}')
+        self.keep_alive_thread = threading.Thread(target = keep_alive_loop, daemon = True)
+        self.keep_alive_thread.start()
         
     def select_contract(self, bracket_num, is_yes):
         '''
@@ -161,13 +664,17 @@ class PiTrader:
             is_yes (bool): Indicate purchase of YES shares or NO shares.
             
         '''
+        from selenium.webdriver.common.by import By
         assert isinstance(bracket_num, int)
         assert isinstance(is_yes, bool)
-        buy_buttons = self.driver.find_elements_by_class_name("market-contract-horizontal-v2__button-single")
-        yes_buttons = buy_buttons[::2] #0-8
-        no_buttons = buy_buttons[1::2] #0-8
-        if is_yes:
-            contract_button = yes_buttons[bracket_num]
-        else:
-            contract_button = no_buttons[bracket_num]
-        contract_button.click()
\ No newline at end of file
+        def click(buy_buttons):
+            yes_buttons = buy_buttons[::2] #0-8
+            no_buttons = buy_buttons[1::2] #0-8
+            if is_yes:
+                contract_button = yes_buttons[bracket_num]
+            else:
+                contract_button = no_buttons[bracket_num]
+            contract_button.click()
+        self.cached_element('buy_buttons',
+                            lambda: self.driver.find_elements(By.CLASS_NAME, "market-contract-horizontal-v2__button-single"),
+                            click)
\ No newline at end of file
@@ -0,0 +1,190 @@
+import asyncio
+import random
+import statistics
+import string
+import time
+from collections import OrderedDict
+
+
+class ProxySession:
+    '''
+    One sticky proxy session. Reusing the same session ID keeps the exit IP,
+    so the HTTP session's pooled connection through it stays warm.
+
+    '''
+    def __init__(self, session_id, url):
+        self.session_id = session_id
+        self.url = url
+        self.created_at = time.time()
+        self.last_used = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.latency = None #Exponentially weighted moving average, seconds
+        self.error_rate = 0.0 #Exponentially weighted moving average
+
+    def describe(self):
+        latency = None if self.latency is None else round(self.latency, 3)
+        return (f'Session: {self.session_id}\t Requests: {self.requests}\t Errors: {self.errors}\t '
+                f'Latency: {latency}\t Error rate: {round(self.error_rate, 3)}')
+
+
+class ProxySessionPool:
+    '''
+    Pool of pre-created sticky proxy sessions. Sessions are handed out least
+    recently used first to stay under per-IP limits, their latency and error
+    rates are tracked, and slow or blocked exits are evicted and replaced by
+    a fresh session that is warmed up in the background.
+
+    Typical usage: init() -> start() -> acquire() -> (make the request) -> report()
+
+    '''
+    GATEWAY = 'gate.dc.smartproxy.com:20000'
+
+    def __init__(self, username, password, size = 10, max_error_rate = 0.5, latency_factor = 3.0,
+                 min_requests = 5, smoothing = 0.2):
+        '''
+        Desc:
+            Creates the sessions. No connections are made until start().
+
+        Params:
+            username (str): Username for proxy service.
+            password (str): Password for proxy service.
+            size (int): Number of sticky sessions to keep.
+            max_error_rate (float): Sessions above this smoothed error rate
+                are evicted.
+            latency_factor (float): Sessions slower than this multiple of the
+                pool's median latency are evicted.
+            min_requests (int): Requests a session must have made before it
+                can be evicted.
+            smoothing (float): Weight of the newest observation in the
+                moving averages.
+
+        '''
+        assert size > 0, 'Pool needs at least one session.'
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_error_rate = max_error_rate
+        self.latency_factor = latency_factor
+        self.min_requests = min_requests
+        self.smoothing = smoothing
+        self.sessions = OrderedDict() #url -> ProxySession, least recently used first
+        self.evicted = 0
+        self.http_session = None
+        self.warm_up_url = None
+        self.background = set()
+        for i in range(size):
+            self.add_session()
+
+    def session_id_generator(self):
+        return ''.join(random.choice(string.ascii_letters) for i in range(8))
+
+    def add_session(self):
+        session_id = self.session_id_generator()
+        url = f'http://user-{self.username}-session-{session_id}:{self.password}@{self.GATEWAY}'
+        proxy_session = ProxySession(session_id, url)
+        self.sessions[url] = proxy_session
+        self.sessions.move_to_end(url, last = False) #Fresh sessions are used first
+        return proxy_session
+
+    async def start(self, http_session, warm_up_url):
+        '''
+        Desc:
+            Opens a connection to warm_up_url through every session, so the
+            first real requests skip the TCP and TLS handshakes. Later
+            replacements are warmed up the same way in the background.
+
+        Params:
+            http_session (aiohttp ClientSession): Session the bots request with.
+            warm_up_url (str): URL on the host the bots will request.
+
+        '''
+        self.http_session = http_session
+        self.warm_up_url = warm_up_url
+        await asyncio.gather(*(self.warm_up(proxy_session) for proxy_session in list(self.sessions.values())))
+
+    async def warm_up(self, proxy_session):
+        start = time.time()
+        try:
+            async with self.http_session.head(self.warm_up_url, proxy = proxy_session.url, timeout = 5) as response:
+                is_error = response.status >= 400
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            is_error = True
+        self.report(proxy_session.url, time.time() - start, is_error)
+
+    def acquire(self):
+        '''
+        Desc:
+            Hands out the least recently used session.
+
+        Returns:
+            proxy_session (ProxySession)
+
+        '''
+        url, proxy_session = next(iter(self.sessions.items()))
+        self.sessions.move_to_end(url)
+        proxy_session.last_used = time.time()
+        return proxy_session
+
+    def report(self, url, latency = None, is_error = False):
+        '''
+        Desc:
+            Records the outcome of a request and evicts the session if it
+            has turned slow or blocked.
+
+        Params:
+            url (str): Proxy URL of the session used.
+            latency (float): Seconds the request took. Ignored on errors.
+            is_error (bool): Whether the request failed.
+
+        '''
+        proxy_session = self.sessions.get(url)
+        if proxy_session is None:
+            return #Already evicted
+        proxy_session.requests += 1
+        proxy_session.error_rate += self.smoothing * (float(is_error) - proxy_session.error_rate)
+        if is_error:
+            proxy_session.errors += 1
+        elif latency is not None:
+            if proxy_session.latency is None:
+                proxy_session.latency = latency
+            else:
+                proxy_session.latency += self.smoothing * (latency - proxy_session.latency)
+        if self.is_unhealthy(proxy_session):
+            self.evict(proxy_session)
+
+    def median_latency(self):
+        latencies = [s.latency for s in self.sessions.values() if s.latency is not None]
+        if not latencies:
+            return None
+        return statistics.median(latencies)
+
+    def is_unhealthy(self, proxy_session):
+        if proxy_session.requests < self.min_requests:
+            return False
+        if proxy_session.error_rate > self.max_error_rate:
+            return True
+        median = self.median_latency()
+        return (median is not None) and (proxy_session.latency is not None) \
+            and (proxy_session.latency > self.latency_factor * median)
+
+    def evict(self, proxy_session):
+        '''
+        Desc:
+            Drops a session and replaces it with a fresh one, warmed up in
+            the background if the pool has been started.
+
+        '''
+        del self.sessions[proxy_session.url]
+        self.evicted += 1
+        print(f'Evicted proxy {proxy_session.describe()}')
+        replacement = self.add_session()
+        if self.http_session is not None:
+            task = asyncio.ensure_future(self.warm_up(replacement))
+            self.background.add(task)
+            task.add_done_callback(self.background.discard)
+
+    def describe(self):
+        return '\n'.join(s.describe() for s in self.sessions.values()) + f'\nEvicted: {self.evicted}'
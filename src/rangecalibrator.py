@@ -0,0 +1,147 @@
+class FteRangeCalibrator:
+    '''
+    Keeps track of where the latest "All polls" row sits in the FTE topline
+    CSV, so each check only requests the few bytes from the start of that
+    row to the end of its approval estimate. Every window is validated
+    against the row's anchor. A window that does not start with it means
+    the layout has shifted, and the offset is rediscovered from a full
+    fetch.
+
+    Typical usage: calibrate() (on a full body) -> request_headers() -> extract() (on the window)
+
+    '''
+    ANCHOR = b',All polls,'
+
+    def __init__(self, slack = 8):
+        '''
+        Params:
+            slack (int): Extra bytes requested past the estimate, so the
+                window still holds it when the date or estimate grow by a
+                character.
+
+        '''
+        self.slack = slack
+        self.offset = None #Byte offset of the latest All polls row
+        self.window = None #Bytes requested from offset
+        self.prefix = None #Row start up to and including the anchor
+        self.calibrations = 0
+        self.validation_failures = 0
+
+    @property
+    def is_calibrated(self):
+        return self.offset is not None
+
+    def request_headers(self):
+        '''
+        Returns:
+            headers (dict): Range header for the calibrated window, empty
+                if a full fetch is needed.
+
+        '''
+        if not self.is_calibrated:
+            return {}
+        return {'Range': f'bytes={self.offset}-{self.offset + self.window - 1}'}
+
+    @classmethod
+    def find_estimate(cls, raw, subgroup = None):
+        '''
+        Desc:
+            Locates the approval estimate of the first All polls row.
+
+        Params:
+            raw (bytes): CSV body or a part of it.
+            subgroup (int): Position of the anchor if already known.
+
+        Returns:
+            (start, end) (tuple(int, int)): Byte span of the estimate, or
+                None if the row or its estimate is not complete in raw.
+
+        '''
+        if subgroup is None:
+            subgroup = raw.find(cls.ANCHOR)
+            if subgroup < 0:
+                return None
+        date_end = raw.find(b',', subgroup + len(cls.ANCHOR))
+        if date_end < 0:
+            return None
+        estimate_end = raw.find(b',', date_end + 1)
+        if estimate_end < 0:
+            return None
+        return date_end + 1, estimate_end
+
+    @classmethod
+    def parse(cls, raw):
+        '''
+        Desc:
+            Reads the latest All polls estimate straight from the bytes,
+            without decoding or splitting the CSV.
+
+        Returns:
+            fte_poll_result (float): Estimate rounded as the market settles
+                it, or None if raw holds no complete All polls row.
+
+        '''
+        span = cls.find_estimate(raw)
+        if span is None:
+            return None
+        return round(float(raw[span[0]:span[1]]), 1)
+
+    def calibrate(self, body):
+        '''
+        Desc:
+            Finds the row offset and the window size in a full body.
+            Throws ValueError if the body has no All polls row.
+
+        Returns:
+            fte_poll_result (float): Estimate in the body.
+
+        '''
+        subgroup = body.find(self.ANCHOR)
+        span = None if subgroup < 0 else self.find_estimate(body, subgroup)
+        if span is None:
+            raise ValueError('FTE CSV has no All polls row.')
+        self.offset = body.rfind(b'\n', 0, subgroup) + 1
+        self.prefix = bytes(body[self.offset:subgroup + len(self.ANCHOR)])
+        self.window = span[1] + 1 - self.offset + self.slack
+        self.calibrations += 1
+        return round(float(body[span[0]:span[1]]), 1)
+
+    def extract(self, chunk, is_partial = True):
+        '''
+        Desc:
+            Validates a response and reads the estimate out of it.
+
+        Params:
+            chunk (bytes): Response body.
+            is_partial (bool): Whether the server answered the range with
+                206. Otherwise the full body was sent, which is used to
+                calibrate.
+
+        Returns:
+            fte_poll_result (float): None if the window failed validation
+                and the offset has to be rediscovered.
+
+        '''
+        if not is_partial:
+            return self.calibrate(chunk)
+        span = None
+        if chunk.startswith(self.prefix):
+            span = self.find_estimate(chunk, len(self.prefix) - len(self.ANCHOR))
+        if span is None:
+            self.invalidate()
+            return None
+        return round(float(chunk[span[0]:span[1]]), 1)
+
+    def invalidate(self):
+        '''
+        Desc:
+            Drops the window, e.g. when the server answers it with 416, so
+            the next check rediscovers the offset.
+
+        '''
+        self.validation_failures += 1
+        self.offset = None
+
+    def describe(self):
+        return (f'Offset: {self.offset}\t Window: {self.window} bytes\t Calibrations: {self.calibrations}\t '
+                f'Validation failures: {self.validation_failures}')
@@ -0,0 +1,194 @@
+import asyncio
+import datetime
+import time
+import numpy as np
+import maintenance
+
+
+MINUTES_PER_DAY = 1440
+
+
+def eastern_minutes(timestamps):
+    '''
+    Desc:
+        Converts time.time() values to ET minutes of the day.
+
+    Returns:
+        minutes (numpy int array): Within [0, 1440).
+
+    '''
+    import pytz #Imported on first use to keep startup light
+    tz = pytz.timezone(maintenance.TIMEZONE)
+    minutes = []
+    for timestamp in timestamps:
+        eastern = datetime.datetime.fromtimestamp(float(timestamp), tz)
+        minutes.append(eastern.hour * 60 + eastern.minute)
+    return np.array(minutes, dtype = int)
+
+
+class RatePlanner:
+    '''
+    Plans the request rate minute by minute from the times of day a poll
+    source has published updates before. With requests evenly spaced at r
+    per second, an update waits 1 / (2r) seconds on average to be seen, so
+    for a fixed daily budget the expected detection latency is lowest with
+    rates proportional to the square root of the update probability of each
+    minute. Minutes inside PredictIt's maintenance window are not traded
+    and only get the minimum rate.
+
+    Typical usage: init() -> learn() -> plan() -> drive(scheduler) or rate_at()
+
+    '''
+    def __init__(self, pollster, prior = 0.1, spread = 5):
+        '''
+        Params:
+            pollster (str): 'rcp' or 'fte', for reports.
+            prior (float): Pseudo-count of updates added to every minute, so
+                minutes without history still get checked.
+            spread (int): Minutes on either side an update is smeared over,
+                since publish times drift from day to day.
+
+        '''
+        self.pollster = pollster
+        self.prior = prior
+        self.spread = spread
+        self.counts = np.zeros(MINUTES_PER_DAY)
+        self.updates = 0
+        self.rates = None #Requests per second for every minute of the day
+        self.daily_budget = None
+        self.maintenance = np.array([maintenance.is_maintenance_minute(m) for m in range(MINUTES_PER_DAY)])
+
+    def learn(self, update_times):
+        '''
+        Desc:
+            Adds observed publish times, e.g. ObservationStore.update_times()
+            or the received times of PollReplayer changes.
+
+        Params:
+            update_times (iterable of floats): time.time() of each update.
+
+        '''
+        minutes = eastern_minutes(update_times)
+        np.add.at(self.counts, minutes, 1)
+        self.updates += len(minutes)
+
+    def probabilities(self):
+        '''
+        Returns:
+            probabilities (numpy array): Chance that an update falls in each
+                ET minute of the day.
+
+        '''
+        kernel = np.ones(2 * self.spread + 1)
+        #Wrapped around midnight before smoothing
+        padded = np.concatenate([self.counts[-self.spread:], self.counts, self.counts[:self.spread]]) \
+            if self.spread else self.counts
+        smoothed = np.convolve(padded, kernel, mode = 'valid') + self.prior
+        return smoothed / smoothed.sum()
+
+    def plan(self, daily_budget, min_rate = 0.05, max_rate = 50.0):
+        '''
+        Desc:
+            Splits a daily request budget over the minutes of the day.
+
+        Params:
+            daily_budget (float): Requests per day.
+            min_rate (float): Requests per second every minute gets, to keep
+                the reference value fresh.
+            max_rate (float): Requests per second no minute exceeds, e.g.
+                the proxy plan's limit.
+
+        Returns:
+            budget (numpy array): Requests in each ET minute of the day.
+
+        '''
+        assert daily_budget >= min_rate * 60 * MINUTES_PER_DAY, 'Budget does not cover the minimum rate.'
+        weights = np.sqrt(self.probabilities())
+        rates = np.full(MINUTES_PER_DAY, float(min_rate))
+        free = ~self.maintenance
+        remaining = daily_budget - 60 * min_rate * self.maintenance.sum()
+        #Minutes pushed beyond a limit are pinned to it and the rest is split again
+        while free.any():
+            rates[free] = remaining * weights[free] / (60 * weights[free].sum())
+            low = free & (rates < min_rate)
+            high = free & (rates > max_rate)
+            if not (low.any() or high.any()):
+                break
+            rates[low] = min_rate
+            rates[high] = max_rate
+            pinned = low | high
+            remaining -= 60 * rates[pinned].sum()
+            free &= ~pinned
+        self.rates = rates
+        self.daily_budget = daily_budget
+        return rates * 60
+
+    def expected_latency(self, rates = None):
+        '''
+        Desc:
+            Average wait between an update and the first check after it,
+            weighted by the update probabilities. Request latency is extra.
+
+        Params:
+            rates (numpy array): Requests per second per minute. Defaults
+                to the planned rates.
+
+        Returns:
+            latency (float): Seconds.
+
+        '''
+        if rates is None:
+            rates = self.rates
+        return float(np.sum(self.probabilities() / (2 * rates)))
+
+    def flat_rates(self):
+        return np.full(MINUTES_PER_DAY, self.daily_budget / (60 * MINUTES_PER_DAY))
+
+    def rate_at(self, timestamp = None):
+        '''
+        Returns:
+            request_rate (float): Planned requests per second at the given
+                time.time(), now if None.
+
+        '''
+        assert self.rates is not None, 'Run plan() first.'
+        if timestamp is None:
+            timestamp = time.time()
+        return float(self.rates[eastern_minutes([timestamp])[0]])
+
+    async def drive(self, scheduler):
+        '''
+        Desc:
+            Sets the scheduler's rate at the start of every minute until
+            cancelled.
+
+        Params:
+            scheduler (RequestScheduler): The PollChecker's scheduler.
+
+        '''
+        while True:
+            scheduler.set_rate(self.rate_at())
+            await asyncio.sleep(60 - time.time() % 60)
+
+    def describe(self, top = 5):
+        planned = self.expected_latency()
+        flat = self.expected_latency(self.flat_rates())
+        lines = [f'Pollster: {self.pollster}\t Updates learned: {self.updates}\t '
+                 f'Daily budget: {round(self.daily_budget)} requests',
+                 f'Expected detection latency: {planned * 1e3:.1f} ms (flat rate: {flat * 1e3:.1f} ms)']
+        for minute in np.argsort(self.rates)[::-1][:top]:
+            lines.append(f'{minute // 60:02d}:{minute % 60:02d} ET\t Rate: {self.rates[minute]:.2f}/s')
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import sys
+    from timeseries import ObservationStore
+    if len(sys.argv) < 4:
+        print('Usage: python rateplanner.py observation_store capacity daily_budget')
+        sys.exit(1)
+    store = ObservationStore(int(sys.argv[2]), sys.argv[1])
+    planner = RatePlanner(store.pollster)
+    planner.learn(store.update_times())
+    planner.plan(float(sys.argv[3]))
+    print(planner.describe())
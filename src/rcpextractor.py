@@ -0,0 +1,126 @@
+import re
+
+
+class RcpExtractor:
+    '''
+    Incremental byte-level scanner for the RealClearPolitics polling page.
+    Bytes are fed in as they arrive from the socket and the scanner stops as
+    soon as the spread cell of the RCP average row has been seen, so the rest
+    of the page never has to be read, decoded or parsed.
+
+    Typical usage: init() -> feed() (until it returns True) -> result
+
+    '''
+
+    ROW_MARKER = b'rcpAvg'
+    ROW_END = b'</tr'
+    CELL_END = b'</td'
+    #Opening tag of a td cell carrying the 'spread' class
+    SPREAD_CELL = re.compile(rb'<td[^>]*\bclass\s*=\s*["\'][^"\']*\bspread\b[^"\']*["\'][^>]*>', re.IGNORECASE)
+    TAGS = re.compile(rb'<[^>]*>')
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.result = None
+        self.failed = False
+        self.row_start = None
+        self.cell_start = None
+        self.scan_pos = 0 #Buffer position where the next search resumes
+
+    @property
+    def done(self):
+        return (self.result is not None) or self.failed
+
+    def feed(self, data):
+        '''
+        Desc:
+            Appends newly received bytes and advances the scan as far as the
+            buffered data allows.
+
+        Params:
+            data (bytes): Next piece of the raw response body.
+
+        Returns:
+            done (bool): True once the spread has been extracted or the row
+                was found to be malformed. No more data needs to be fed.
+
+        '''
+        if self.done:
+            return True
+        self.buffer += data
+        if self.row_start is None:
+            self.find_row()
+        if (self.row_start is not None) and (self.cell_start is None):
+            self.find_cell()
+        if self.cell_start is not None:
+            self.find_cell_end()
+        return self.done
+
+    def find_row(self):
+        buf = self.buffer
+        while True:
+            idx = buf.find(self.ROW_MARKER, self.scan_pos)
+            if idx == -1:
+                #Marker may be split across two pieces of data
+                self.scan_pos = max(self.scan_pos, len(buf) - len(self.ROW_MARKER) + 1)
+                return
+            tag_start = buf.rfind(b'<', 0, idx)
+            if (tag_start != -1) and (buf[tag_start:tag_start + 3].lower() == b'<tr') \
+                    and (buf.find(b'>', tag_start, idx) == -1):
+                self.row_start = idx
+                self.scan_pos = idx
+                return
+            self.scan_pos = idx + len(self.ROW_MARKER)
+
+    def find_cell(self):
+        buf = self.buffer
+        match = self.SPREAD_CELL.search(buf, self.scan_pos)
+        row_end = buf.find(self.ROW_END, self.row_start)
+        if (match is None) or ((row_end != -1) and (row_end < match.start())):
+            if row_end != -1:
+                self.failed = True #Row closed without a spread cell
+            else:
+                #A partial tag may still be arriving, resume from its start
+                last_tag = buf.rfind(b'<', self.scan_pos)
+                if last_tag != -1:
+                    self.scan_pos = last_tag
+            return
+        self.cell_start = match.end()
+        self.scan_pos = match.end()
+
+    def find_cell_end(self):
+        buf = self.buffer
+        idx = buf.find(self.CELL_END, self.scan_pos)
+        if idx == -1:
+            self.scan_pos = max(self.scan_pos, len(buf) - len(self.CELL_END) + 1)
+            return
+        text = self.TAGS.sub(b' ', bytes(buf[self.cell_start:idx])).split()
+        try:
+            self.result = (text[0].decode('utf-8'), float(text[1]))
+        except (IndexError, ValueError, UnicodeDecodeError):
+            self.failed = True
+
+    @classmethod
+    def extract(cls, raw, piece_size = 0):
+        '''
+        Desc:
+            Convenience wrapper that scans an already received body.
+
+        Params:
+            raw (bytes): Raw response body from the RCP polling page.
+            piece_size (int): If positive, the body is fed in pieces of
+                this size to mimic a streamed response.
+
+        Returns:
+            rcp_poll_results (tuple(str, float)): Current leader in polling and
+                the leader's polling advantage, or None if the row was not found.
+
+        '''
+        extractor = cls()
+        if piece_size <= 0:
+            extractor.feed(raw)
+            return extractor.result
+        for start in range(0, len(raw), piece_size):
+            if extractor.feed(raw[start:start + piece_size]):
+                break
+        return extractor.result
@@ -0,0 +1,233 @@
+import os
+import struct
+import time
+from collections import namedtuple
+
+
+PollRecord = namedtuple('PollRecord', ['started', 'received', 'bot_id', 'raw'])
+ReplayChange = namedtuple('ReplayChange', ['received', 'old_bracket', 'new_bracket', 'raw_value', 'bot_id',
+                                           'last_old_started'])
+
+MAGIC = b'PILOG1'
+RECORD_HEADER = struct.Struct('<ddHI') #started, received, bot id, payload length
+
+
+class PollRecorder:
+    '''
+    Append-only log of raw poll responses. Each record holds the request
+    start and receive timestamps, the bot ID and the raw bytes. A zero length
+    payload marks a 304 Not Modified response.
+
+    Typical usage: init() -> record() (from the fetch functions) -> close()
+
+    '''
+    def __init__(self, path, pollster, flush_every = 100):
+        '''
+        Desc:
+            Opens the log for appending, writing the file header if new.
+
+        Params:
+            path (str): Log file path.
+            pollster (str): 'rcp' or 'fte'. Stored in the header so the log
+                is replayed with the right parser.
+            flush_every (int): Records buffered before writing to disk.
+
+        '''
+        assert pollster in ('rcp', 'fte'), 'Pollster is not recognized'
+        is_new = (not os.path.exists(path)) or (os.path.getsize(path) == 0)
+        if not is_new:
+            with open(path, 'rb') as f:
+                header_pollster = read_header(f)
+            assert header_pollster == pollster, f'Log was recorded for {header_pollster}.'
+        self.path = path
+        self.pollster = pollster
+        self.flush_every = flush_every
+        self.pending = 0
+        self.records = 0
+        self.file = open(path, 'ab')
+        if is_new:
+            self.file.write(MAGIC + pollster.encode('ascii'))
+
+    def record(self, raw, started, bot_id = 0, received = None):
+        '''
+        Desc:
+            Appends one response.
+
+        Params:
+            raw (bytes): Raw response body, b'' for a 304.
+            started (float): time.time() when the request was made.
+            bot_id (int): The ID of the poll checking bot.
+            received (float): time.time() when the body was read. Now if None.
+
+        '''
+        if received is None:
+            received = time.time()
+        self.file.write(RECORD_HEADER.pack(started, received, bot_id or 0, len(raw)))
+        self.file.write(raw)
+        self.records += 1
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+
+    def close(self):
+        self.file.close()
+
+
+def read_header(f):
+    header = f.read(len(MAGIC) + 3)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError('File is not a poll log.')
+    return header[len(MAGIC):].decode('ascii')
+
+
+def read_records(path):
+    '''
+    Desc:
+        Iterates over the records of a poll log. A truncated last record,
+        e.g. after a crash mid-write, is ignored.
+
+    Returns:
+        pollster (str), records (generator of PollRecord)
+
+    '''
+    f = open(path, 'rb')
+    pollster = read_header(f)
+    def records():
+        with f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                started, received, bot_id, length = RECORD_HEADER.unpack(header)
+                raw = f.read(length)
+                if len(raw) < length:
+                    return
+                yield PollRecord(started, received, bot_id, raw)
+    return pollster, records()
+
+
+class PollReplayer:
+    '''
+    Feeds a recorded poll log through the parse and classify pipeline, in
+    real time or as fast as possible. Used to check parser changes against
+    real history, measure throughput, and see how early each historical
+    bracket change was detected.
+
+    Typical usage: init() -> replay() -> describe()
+
+    '''
+    def __init__(self, path, market):
+        '''
+        Params:
+            path (str): Log file written by PollRecorder.
+            market (MarketData): Market to classify the values for.
+
+        '''
+        self.path = path
+        self.market = market
+        self.changes = []
+        self.values = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def replay(self, realtime = False, speed = 1.0, bot_ids = None, parse = None):
+        '''
+        Desc:
+            Replays the log in receive order and reports every bracket change.
+
+        Params:
+            realtime (bool): Sleep between records to reproduce the recorded
+                timing, divided by speed.
+            speed (float): Replay speed-up when realtime.
+            bot_ids (set of ints): Only replay responses of these bots, to
+                see how detection would have fared with fewer bots.
+            parse (function): Parser from (pollster, raw bytes) to a poll
+                value. Defaults to PollChecker.parse_raw.
+
+        Returns:
+            changes (list of ReplayChange): last_old_started is the start of
+                the last request that still saw the old value, so the change
+                was published between it and received.
+
+        '''
+        if parse is None:
+            from pollchecker import PollChecker
+            parse = PollChecker.parse_raw
+        pollster, records = read_records(self.path)
+        records = sorted(records, key = lambda rec: rec.received)
+        self.changes = []
+        self.values = 0
+        self.errors = 0
+        reference_value = None
+        reference_bracket = None
+        last_old_started = None
+        first_received = None
+        start = time.perf_counter()
+        for rec in records:
+            if (bot_ids is not None) and (rec.bot_id not in bot_ids):
+                continue
+            if realtime:
+                if first_received is None:
+                    first_received = rec.received
+                    replay_start = time.perf_counter()
+                delay = (rec.received - first_received) / speed - (time.perf_counter() - replay_start)
+                if delay > 0:
+                    time.sleep(delay)
+            if not rec.raw:
+                if reference_value is not None: #304, value unchanged
+                    last_old_started = max(last_old_started, rec.started)
+                continue
+            try:
+                current_value = parse(pollster, rec.raw)
+            except Exception:
+                self.errors += 1
+                continue
+            self.values += 1
+            if current_value is None:
+                self.errors += 1
+                continue
+            if current_value == reference_value:
+                last_old_started = max(last_old_started, rec.started)
+                continue
+            new_bracket = self.market.buy_bracket_selector(current_value)
+            if (reference_bracket is not None) and (new_bracket != reference_bracket):
+                self.changes.append(ReplayChange(rec.received, reference_bracket, new_bracket, current_value,
+                                                 rec.bot_id, last_old_started))
+            reference_value = current_value
+            reference_bracket = new_bracket
+            last_old_started = rec.started
+        self.elapsed = time.perf_counter() - start
+        return self.changes
+
+    @property
+    def throughput(self):
+        if self.elapsed == 0:
+            return 0.0
+        return self.values / self.elapsed
+
+    def describe(self):
+        lines = [f'Values: {self.values}\t Errors: {self.errors}\t '
+                 f'Throughput: {round(self.throughput)} values/s']
+        for change in self.changes:
+            window = None
+            if change.last_old_started is not None:
+                window = round(change.received - change.last_old_started, 3)
+            lines.append(f'Change {change.old_bracket} -> {change.new_bracket}\t Value: {change.raw_value}\t '
+                         f'Received: {round(change.received, 3)}\t Bot: {change.bot_id}\t '
+                         f'Detected within: {window} s of publication')
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import sys
+    from marketdata import MarketData
+    if len(sys.argv) < 3:
+        print('Usage: python recorder.py poll_log market_num [--realtime]')
+        sys.exit(1)
+    replayer = PollReplayer(sys.argv[1], MarketData(int(sys.argv[2])))
+    replayer.replay(realtime = '--realtime' in sys.argv)
+    print(replayer.describe())
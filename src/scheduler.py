@@ -0,0 +1,125 @@
+import asyncio
+import random
+import time
+
+
+class ProxyBackoff:
+    '''
+    Backoff state of a single proxy.
+
+    '''
+    def __init__(self):
+        self.delay = 0.0
+        self.not_before = 0.0
+        self.errors = 0
+        self.rate_limits = 0
+
+
+class RequestScheduler:
+    '''
+    Central pacing for the checking bots of a PollChecker. Request slots are
+    handed out one period apart on a single global timeline, so the bots end
+    up evenly phase-shifted instead of firing in bursts. Proxies that fail or
+    get rate limited are backed off exponentially and recover gradually on
+    every success.
+
+    Typical usage: init() -> wait_for_slot() -> (make the request) ->
+                   report_success() or report_error()
+
+    '''
+    RATE_LIMIT_STATUSES = (429, 503)
+
+    def __init__(self, request_rate, jitter = 0.0, base_backoff = 0.5, max_backoff = 30.0, recovery = 0.5):
+        '''
+        Desc:
+            Sets the target request rate and the backoff policy.
+
+        Params:
+            request_rate (float): Target requests per second across all bots.
+            jitter (float): Fraction of the slot period, within [0, 1), by
+                which each slot is randomly shifted.
+            base_backoff (float): Seconds a proxy waits after its first error.
+            max_backoff (float): Upper limit of a proxy's backoff in seconds.
+            recovery (float): Factor applied to a proxy's backoff on each
+                success. Smaller values recover faster.
+
+        '''
+        assert request_rate > 0, 'Request rate must be positive.'
+        assert 0 <= jitter < 1, 'Jitter must be within [0, 1).'
+        self.period = 1.0 / request_rate
+        self.jitter = jitter
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.recovery = recovery
+        self.next_slot = 0.0
+        self.backoffs = {}
+
+    def set_rate(self, request_rate):
+        assert request_rate > 0, 'Request rate must be positive.'
+        self.period = 1.0 / request_rate
+
+    def reserve_slot(self):
+        '''
+        Desc:
+            Reserves the next free slot on the global timeline. Slots that
+            passed without a bot waiting are not made up for, which keeps
+            requests from bunching after a stall.
+
+        Returns:
+            slot (float): time.monotonic() value at which to fire.
+
+        '''
+        now = time.monotonic()
+        slot = max(self.next_slot, now)
+        self.next_slot = slot + self.period
+        if self.jitter:
+            slot += random.uniform(-self.jitter, self.jitter) * self.period
+        return slot
+
+    async def wait_for_slot(self, proxy = None):
+        '''
+        Desc:
+            Sleeps until the proxy's backoff has expired and the next request
+            slot has arrived.
+
+        Params:
+            proxy (str): Proxy the upcoming request is made through.
+
+        '''
+        backoff = self.backoffs.get(proxy)
+        if (backoff is not None) and (backoff.not_before > time.monotonic()):
+            await asyncio.sleep(backoff.not_before - time.monotonic())
+        delay = self.reserve_slot() - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def report_success(self, proxy = None):
+        backoff = self.backoffs.get(proxy)
+        if backoff is None:
+            return
+        backoff.delay *= self.recovery
+        if backoff.delay < self.period:
+            del self.backoffs[proxy] #Fully recovered
+
+    def report_error(self, proxy = None, error = None):
+        '''
+        Desc:
+            Backs off the proxy. Rate limiting responses back off twice as
+            hard as other errors.
+
+        Params:
+            proxy (str): Proxy the failed request was made through.
+            error (Exception): The raised error, used to detect rate limiting.
+
+        '''
+        backoff = self.backoffs.get(proxy)
+        if backoff is None:
+            backoff = ProxyBackoff()
+            self.backoffs[proxy] = backoff
+        factor = 2.0
+        if getattr(error, 'status', None) in self.RATE_LIMIT_STATUSES:
+            factor = 4.0
+            backoff.rate_limits += 1
+        backoff.errors += 1
+        backoff.delay = min(self.max_backoff, max(self.base_backoff, backoff.delay * factor))
+        backoff.not_before = time.monotonic() + backoff.delay
@@ -0,0 +1,89 @@
+import base64
+import json
+import os
+import time
+
+
+SALT_SIZE = 16
+KDF_ITERATIONS = 200000
+
+
+class SessionStore:
+    '''
+    Encrypted file holding a logged-in browser session: its cookies and the
+    site's local storage. The key is derived from a secret, by default the
+    PredictIt password, so the file is useless to anyone without it. A
+    salt is kept in plain text in front of the encrypted session.
+
+    Typical usage: init() -> load() (on start) -> save() (after a login)
+
+    '''
+    def __init__(self, path, secret):
+        '''
+        Params:
+            path (str): File to keep the session in.
+            secret (str): Secret the encryption key is derived from.
+
+        '''
+        self.path = path
+        self.secret = secret.encode('utf-8')
+        self.keys = {} #Salt -> Fernet, the key derivation is slow on purpose
+
+    def fernet(self, salt):
+        if salt not in self.keys:
+            #Imported on first use to keep startup light
+            from cryptography.fernet import Fernet
+            from cryptography.hazmat.primitives import hashes
+            from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+            kdf = PBKDF2HMAC(algorithm = hashes.SHA256(), length = 32, salt = salt, iterations = KDF_ITERATIONS)
+            self.keys[salt] = Fernet(base64.urlsafe_b64encode(kdf.derive(self.secret)))
+        return self.keys[salt]
+
+    def save(self, cookies, local_storage, expires_at):
+        '''
+        Desc:
+            Encrypts and writes the session. Only the owner can read the
+            file.
+
+        Params:
+            cookies (list of dicts): As returned by driver.get_cookies().
+            local_storage (dict): The site's local storage items.
+            expires_at (float): time.time() the session stops working.
+
+        '''
+        session = {'cookies': cookies, 'local_storage': local_storage,
+                   'saved_at': time.time(), 'expires_at': expires_at}
+        salt = os.urandom(SALT_SIZE)
+        token = self.fernet(salt).encrypt(json.dumps(session).encode('utf-8'))
+        #Written aside and renamed, so a crash never leaves a partial session
+        temp_path = self.path + '.tmp'
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(salt + token)
+        os.replace(temp_path, self.path)
+
+    def load(self):
+        '''
+        Returns:
+            session (dict): 'cookies', 'local_storage', 'saved_at' and
+                'expires_at', or None if there is no usable session, e.g. it
+                expired or was saved with another secret.
+
+        '''
+        if not os.path.exists(self.path):
+            return None
+        from cryptography.fernet import InvalidToken
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        try:
+            session = json.loads(self.fernet(data[:SALT_SIZE]).decrypt(data[SALT_SIZE:]))
+        except (InvalidToken, ValueError):
+            print(f'Ignoring unreadable session {self.path}')
+            return None
+        if session['expires_at'] <= time.time():
+            return None
+        return session
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,430 @@
+import asyncio
+import hashlib
+import random
+import secrets
+import socket
+import threading
+import time
+from aiohttp import web
+
+
+MARKET_PAGE = '''<!DOCTYPE html>
+<html>
+<head><title>{name}</title></head>
+<body>
+<button id="login" onclick="document.getElementById('login-form').style.display = 'block'">Log In</button>
+<form id="login-form" style="display: none" onsubmit="return logIn()">
+    <input id="username" type="text">
+    <input id="password" type="password">
+    <button type="submit">Log In</button>
+</form>
+<div class="market-contracts">
+{contracts}
+</div>
+<div class="purchase-offer-desktop">
+    <input class="purchase-offer-value__input" type="text">
+    <input class="purchase-quantity-value__input" type="text">
+    <span class="checkbox__tick" onclick="this.classList.toggle('checked')"></span>
+    <button class="purchase-offer-desktop__footer-next-button" onclick="submitTrade()">Submit Offer</button>
+</div>
+<script>
+var selected = null;
+function logIn() {{
+    var body = new URLSearchParams({{
+        email: document.getElementById('username').value,
+        password: document.getElementById('password').value,
+        grant_type: 'password'
+    }});
+    fetch('/api/Account/token', {{method: 'POST', body: body}})
+        .then(function (r) {{ return r.json(); }})
+        .then(function (t) {{ localStorage.setItem('token', t.access_token); }});
+    document.getElementById('login-form').style.display = 'none';
+    return false;
+}}
+function selectContract(contractId, tradeType) {{
+    selected = {{contractId: contractId, tradeType: tradeType}};
+}}
+function submitTrade() {{
+    var price = parseInt(document.getElementsByClassName('purchase-offer-value__input')[0].value, 10);
+    var quantity = parseInt(document.getElementsByClassName('purchase-quantity-value__input')[0].value, 10);
+    fetch('/api/Trade/SubmitTrade', {{
+        method: 'POST',
+        headers: {{'Content-Type': 'application/json', 'Authorization': 'Bearer ' + localStorage.getItem('token')}},
+        body: JSON.stringify({{contractId: selected.contractId, tradeType: selected.tradeType,
+                              pricePerShare: price / 100, quantity: quantity}})
+    }});
+}}
+</script>
+</body>
+</html>
+'''
+
+CONTRACT_ROW = '''    <div class="market-contract-horizontal-v2">
+        <span class="market-contract-horizontal-v2__title">{shortName}</span>
+        <button class="market-contract-horizontal-v2__button-single" onclick="selectContract({id}, 1)">Buy Yes {bestBuyYesCost}</button>
+        <button class="market-contract-horizontal-v2__button-single" onclick="selectContract({id}, 0)">Buy No {bestBuyNoCost}</button>
+    </div>'''
+
+
+RCP_PATH = '/epolls/2020/president/us/general_election_trump_vs_biden-6247.html'
+FTE_PATH = '/trump-approval-data/approval_topline.csv'
+
+RCP_PAGE = '''<!DOCTYPE html>
+<html>
+<head><title>General Election: Trump vs. Biden</title>
+{scripts}
+</head>
+<body>
+<div id="polling-data-rcp">
+<table class="data">
+<tr class="header"><th>Poll</th><th>Date</th><th>Sample</th><th>Biden (D)</th><th>Trump (R)</th><th>Spread</th></tr>
+<tr class="rcpAvg"><td class="noCenter">RCP Average</td><td>4/14 - 5/4</td><td>--</td><td>47.4</td><td>43.4</td><td class="spread"><span class="{party}">{leader} +{spread:.1f}</span></td></tr>
+{polls}
+</table>
+</div>
+</body>
+</html>
+'''
+
+RCP_POLL_ROW = '<tr><td class="noCenter">Poll {i}</td><td>5/1 - 5/3</td><td>1000 RV</td><td>48</td><td>43</td><td class="spread">Biden +5</td></tr>'
+RCP_PAGE_SIZE = 500000 #About the size of the real page, most of it after the table
+
+FTE_HEADER = 'president,subgroup,modeldate,approve_estimate,approve_hi,approve_lo,disapprove_estimate,disapprove_hi,disapprove_lo,timestamp\n'
+FTE_ROW = 'Donald Trump,{subgroup},{date},{approve:.4f},{hi:.4f},{lo:.4f},{disapprove:.4f},{dhi:.4f},{dlo:.4f},{stamp}\n'
+
+DEFAULT_BOUNDS = {
+    'fte': [42.0, 42.5, 43.0, 43.5, 44.0, 44.5, 45.0, 45.5],
+    'rcp': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0],
+}
+
+
+def make_rcp_page(value):
+    leader, spread = value
+    party = 'dem' if leader.lower() == 'biden' else 'rep'
+    scripts = '\n'.join(f'<script>var s{i} = "{"x" * 80}";</script>' for i in range(60))
+    polls = '\n'.join(RCP_POLL_ROW.format(i = i) for i in range(40))
+    page = RCP_PAGE.format(scripts = scripts, party = party, leader = leader, spread = spread, polls = polls)
+    footer = '\n'.join(f'<script>var f{i} = "{"y" * 200}";</script>'
+                       for i in range(max(0, RCP_PAGE_SIZE - len(page)) // 226))
+    return page.replace('</body>', footer + '\n</body>')
+
+
+def make_fte_csv(value, days = 30):
+    rows = [FTE_HEADER]
+    for day in range(days):
+        t = time.gmtime(time.time() - day * 86400)
+        date = f'{t.tm_mon}/{t.tm_mday}/{t.tm_year}' #No strftime, unpadded fields are glibc only
+        stamp = time.strftime('%H:%M:%S %d %b %Y', t)
+        approve = value - day * 0.01
+        for subgroup, shift in (('Voters', 0.4), ('Adults', -0.3), ('All polls', 0.0)):
+            rows.append(FTE_ROW.format(subgroup = subgroup, date = date, approve = approve + shift,
+                                       hi = approve + shift + 4.7, lo = approve + shift - 4.7,
+                                       disapprove = 96 - approve, dhi = 100.6 - approve, dlo = 91.4 - approve,
+                                       stamp = stamp))
+    return ''.join(rows)
+
+
+def make_market(market_num, pollster = 'fte', bounds = None):
+    '''
+    Desc:
+        Builds a market in the shape of the PI marketdata API response.
+
+    Params:
+        market_num (int): PredictIt number assigned to the market.
+        pollster (str): 'rcp' or 'fte'. Decides the market name.
+        bounds (list of nums): Lower bounds of every bracket but the first.
+
+    Returns:
+        market_data (dict)
+
+    '''
+    if bounds is None:
+        bounds = DEFAULT_BOUNDS[pollster]
+    names = [f'{bounds[0] - 0.1:.1f} or lower']
+    names += [f'{low:.1f} - {high - 0.1:.1f}' for low, high in zip(bounds, bounds[1:])]
+    names.append(f'{bounds[-1]:.1f} or higher')
+    contracts = []
+    for i, short_name in enumerate(names):
+        contracts.append({
+            'id': market_num * 100 + i,
+            'name': short_name,
+            'shortName': short_name,
+            'status': 'Open',
+            'displayOrder': i,
+            'lastTradePrice': 0.1,
+            'bestBuyYesCost': 0.11,
+            'bestBuyNoCost': 0.9,
+            'bestSellYesCost': 0.1,
+            'bestSellNoCost': 0.89,
+            'lastClosePrice': 0.1,
+        })
+    name = 'What will RCP show?' if pollster == 'rcp' else 'What will FTE show?'
+    return {'id': market_num, 'name': name, 'shortName': name, 'status': 'Open',
+            'contracts': contracts, 'timeStamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+class StandInServer:
+    '''
+    Local stand-in for the PredictIt endpoints used by the traders and for
+    the RCP and FTE poll sources. Emulates login, trade submission, the
+    marketdata API, a static market page, the RCP polling page and the FTE
+    topline CSV (with Range requests and ETags), so traders and checkers can
+    be tested and benchmarked with no network. Poll responses can be given
+    a latency and an error rate, and poll values can be changed on a
+    schedule. Runs an aiohttp app on its own event loop in a background
+    thread.
+
+    Typical usage: init() -> start() -> (point the traders and checkers at
+                   url) -> schedule_value() -> stop()
+
+    '''
+    def __init__(self, market_num = 7002, pollster = 'fte', email = 'trader@example.com',
+                 password = 'password', host = '127.0.0.1', port = 0, poll_value = None,
+                 latency = 0.0, latency_spread = 0.0, error_rate = 0.0, stall_rate = 0.0, stall = 1.0,
+                 trade_latency = 0.0):
+        '''
+        Params:
+            market_num (int): PredictIt number of the emulated market.
+            pollster (str): 'rcp' or 'fte', the source of the emulated market.
+            email (str): Accepted PredictIt login.
+            password (str): Accepted PredictIt password.
+            host (str): Interface to serve on.
+            port (int): Port to serve on, 0 picks a free one.
+            poll_value (multiple types): Initial poll value, (leader, spread)
+                for RCP or the approval estimate for FTE.
+            latency (float): Seconds added to every poll response.
+            latency_spread (float): Extra uniformly random seconds, within
+                [0, latency_spread], added to every poll response.
+            error_rate (float): Fraction of poll requests answered with a 503.
+            stall_rate (float): Fraction of poll requests held for an extra
+                stall seconds, like a slow proxy exit.
+            stall (float): Seconds a stalled request is held.
+            trade_latency (float): Seconds added to every order submission.
+
+        '''
+        if poll_value is None:
+            poll_value = ('Biden', 4.5) if pollster == 'rcp' else 43.1234
+        self.market_num = market_num
+        self.pollster = pollster
+        self.market_data = make_market(market_num, pollster)
+        self.email = email
+        self.password = password
+        self.host = host
+        self.port = port
+        self.tokens = set()
+        self.trades = []
+        self.latency = latency
+        self.latency_spread = latency_spread
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.trade_latency = trade_latency
+        self.error_rate = error_rate
+        self.schedule = [(0.0, poll_value)] #(time.time(), value), sorted
+        self.poll_requests = 0
+        self.poll_errors = 0
+        self.pages = {}
+        self.loop = None
+        self.runner = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def rcp_url(self):
+        return self.url + RCP_PATH
+
+    @property
+    def fte_url(self):
+        return self.url + FTE_PATH
+
+    def schedule_value(self, value, at = None):
+        '''
+        Desc:
+            Schedules a poll value change.
+
+        Params:
+            value (multiple types): New poll value.
+            at (float): time.time() at which the value is published. Now if None.
+
+        '''
+        if at is None:
+            at = time.time()
+        self.schedule = sorted(self.schedule + [(at, value)], key = lambda change: change[0])
+
+    def current_value(self):
+        now = time.time()
+        value = self.schedule[0][1]
+        for at, scheduled in self.schedule:
+            if at > now:
+                break
+            value = scheduled
+        return value
+
+    def poll_body(self):
+        '''
+        Desc:
+            Body and ETag of the current poll value, built once per value.
+
+        '''
+        value = self.current_value()
+        page = self.pages.get(value)
+        if page is None:
+            if self.pollster == 'rcp':
+                body = make_rcp_page(value).encode('utf-8')
+            else:
+                body = make_fte_csv(value).encode('utf-8')
+            page = (body, '"' + hashlib.md5(body).hexdigest() + '"')
+            self.pages[value] = page
+        return page
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post('/api/Account/token', self.handle_token)
+        app.router.add_post('/api/Trade/SubmitTrade', self.handle_trade)
+        app.router.add_get('/api/User/Wallet/Balance', self.handle_balance)
+        app.router.add_get('/api/marketdata/markets/{market_num}', self.handle_market_data)
+        app.router.add_get('/markets/detail/{market_num}', self.handle_market_page)
+        app.router.add_get(RCP_PATH, self.handle_rcp)
+        app.router.add_get(FTE_PATH, self.handle_fte)
+        return app
+
+    def start(self):
+        '''
+        Desc:
+            Starts serving in a background thread. Returns once the server
+            accepts connections.
+
+        '''
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target = self.loop.run_forever, daemon = True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.serve(sock), self.loop).result()
+        return self
+
+    async def serve(self, sock):
+        self.runner = web.AppRunner(self.make_app(), access_log = None)
+        await self.runner.setup()
+        await web.SockSite(self.runner, sock).start()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def is_authorized(self, request):
+        auth = request.headers.get('Authorization', '')
+        return auth.startswith('Bearer ') and (auth[len('Bearer '):] in self.tokens)
+
+    async def handle_token(self, request):
+        form = await request.post()
+        if (form.get('email') != self.email) or (form.get('password') != self.password):
+            return web.json_response({'error': 'invalid_grant'}, status = 400)
+        token = secrets.token_hex(16)
+        self.tokens.add(token)
+        response = web.json_response({'access_token': token, 'token_type': 'bearer', 'expires_in': 1209599})
+        response.set_cookie('session', token, max_age = 1209599, httponly = True)
+        return response
+
+    async def handle_balance(self, request):
+        if not self.is_authorized(request):
+            return web.json_response({'message': 'Authorization has been denied for this request.'}, status = 401)
+        return web.json_response({'accountBalance': 1000.0})
+
+    async def handle_trade(self, request):
+        if not self.is_authorized(request):
+            return web.json_response({'message': 'Authorization has been denied for this request.'}, status = 401)
+        order = await request.json()
+        if self.trade_latency > 0:
+            await asyncio.sleep(self.trade_latency)
+        contract_ids = [con['id'] for con in self.market_data['contracts']]
+        if (order.get('contractId') not in contract_ids) or (order.get('tradeType') not in (0, 1)) \
+                or not (0 < order.get('pricePerShare', 0) < 1) or (order.get('quantity', 0) < 1):
+            return web.json_response({'message': 'Invalid order.'}, status = 400)
+        order['offerId'] = len(self.trades) + 1
+        order['receivedAt'] = time.time()
+        self.trades.append(order)
+        return web.json_response({'offer': order})
+
+    async def simulate_conditions(self):
+        '''
+        Desc:
+            Applies the configured latency, stalls and error rate.
+
+        Returns:
+            error_response (web.Response): A 503 to send instead, or None.
+
+        '''
+        self.poll_requests += 1
+        delay = self.latency + random.uniform(0, self.latency_spread)
+        if random.random() < self.stall_rate:
+            delay += self.stall
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if random.random() < self.error_rate:
+            self.poll_errors += 1
+            return web.Response(status = 503, text = 'Service Unavailable')
+        return None
+
+    async def handle_rcp(self, request):
+        error_response = await self.simulate_conditions()
+        if error_response is not None:
+            return error_response
+        body, etag = self.poll_body()
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status = 304, headers = {'ETag': etag})
+        return self.range_response(request, body, etag, 'text/html')
+
+    async def handle_fte(self, request):
+        error_response = await self.simulate_conditions()
+        if error_response is not None:
+            return error_response
+        body, etag = self.poll_body()
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status = 304, headers = {'ETag': etag})
+        return self.range_response(request, body, etag, 'text/csv')
+
+    def range_response(self, request, body, etag, content_type):
+        '''
+        Desc:
+            The body, or the part of it asked for in a Range header.
+
+        '''
+        byte_range = request.http_range
+        if (byte_range.start is None) and (byte_range.stop is None):
+            return web.Response(body = body, content_type = content_type, headers = {'ETag': etag})
+        start = byte_range.start or 0
+        stop = min(len(body), byte_range.stop or len(body))
+        if start >= len(body):
+            return web.Response(status = 416, headers = {'Content-Range': f'bytes */{len(body)}'})
+        headers = {'ETag': etag, 'Content-Range': f'bytes {start}-{stop - 1}/{len(body)}'}
+        return web.Response(status = 206, body = body[start:stop], content_type = content_type, headers = headers)
+
+    async def handle_market_data(self, request):
+        return web.json_response(self.market_data)
+
+    def market_page(self):
+        contracts = '\n'.join(CONTRACT_ROW.format(**con) for con in self.market_data['contracts'])
+        return MARKET_PAGE.format(name = self.market_data['name'], contracts = contracts)
+
+    async def handle_market_page(self, request):
+        return web.Response(text = self.market_page(), content_type = 'text/html')
+
+
+if __name__ == '__main__':
+    server = StandInServer().start()
+    print(f'Serving on {server.url}. Press Enter to stop.')
+    input()
+    server.stop()
@@ -0,0 +1,178 @@
+'''
+Concurrent startup of a trading session. The market is loaded from its
+snapshot or the API, the trader is launched and logged in on a worker
+thread, and the checking bots' connections are warmed up, all at once.
+The browser and parser libraries are only imported by the phases that
+need them.
+
+Usage: python startup.py market_num [--http] [--no-trader] [--bots 4] [--pool-size 10]
+
+'''
+import argparse
+import asyncio
+import time
+from contextlib import contextmanager
+from asyncmarketdata import AsyncMarketData
+from pollchecker import PollChecker
+
+
+class Startup:
+    '''
+    Orchestrates the startup phases and times each one.
+
+    Typical usage: init() -> await run(session) -> describe() -> await checker.detect_change(session)
+
+    '''
+    def __init__(self, market_num, email = None, password = None, proxy_username = None, proxy_password = None,
+                 num_bots = None, trader = 'browser', snapshot_path = None, refresh_interval = 5.0,
+                 trader_kwargs = None, checker_kwargs = None):
+        '''
+        Desc:
+            Prompts for every missing credential up front, since the phases
+            run on other threads and tasks. Nothing is started until run().
+
+        Params:
+            market_num (int): PredictIt number assigned to specific market.
+            email (str): PredictIt login.
+            password (str): PredictIt password.
+            proxy_username (str): Username for proxy service.
+            proxy_password (str): Password for proxy service.
+            num_bots (int): Number of poll checking bots.
+            trader (str): 'browser' for PiTrader, 'http' for HttpTrader or
+                None to only start checking.
+            snapshot_path (str): Market snapshot, see AsyncMarketData.
+            refresh_interval (float): Seconds between market refreshes.
+            trader_kwargs (dict): Extra arguments for the trader.
+            checker_kwargs (dict): Extra arguments for PollChecker, e.g.
+                pool_size or request_rate.
+
+        '''
+        assert trader in ('browser', 'http', None), 'Trader must be browser, http or None.'
+        checker_kwargs = dict(checker_kwargs or {})
+        use_proxy = checker_kwargs.get('use_proxy', True)
+        if num_bots is None:
+            num_bots = int(input("How many checking bots to use? "))
+        if trader is not None:
+            if email is None:
+                email = input("Enter your PredictIt login: ")
+            if password is None:
+                password = input("Enter your PredictIt password: ")
+        if (proxy_username is None) and use_proxy:
+            proxy_username = input("Username for proxy service? ")
+        if (proxy_password is None) and use_proxy:
+            proxy_password = input("Password for proxy service? ")
+        self.market_num = market_num
+        self.email = email
+        self.password = password
+        self.proxy_username = proxy_username
+        self.proxy_password = proxy_password
+        self.num_bots = num_bots
+        self.trader_kind = trader
+        self.trader_kwargs = dict(trader_kwargs or {})
+        self.checker_kwargs = checker_kwargs
+        self.market = AsyncMarketData(market_num, snapshot_path, refresh_interval)
+        self.checker = None
+        self.trader = None
+        self.phases = {} #name -> (start, end), seconds since run() began
+        self.started = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter() - self.started
+        try:
+            yield
+        finally:
+            self.phases[name] = (start, time.perf_counter() - self.started)
+
+    async def start_market(self, session):
+        with self.phase('market'):
+            await self.market.start(session)
+
+    async def start_checking(self, session):
+        await self.start_market(session)
+        with self.phase('checker'):
+            self.checker = PollChecker(self.market_num, self.proxy_username, self.proxy_password, self.num_bots,
+                                       market = self.market, **self.checker_kwargs)
+        with self.phase('warm_up'):
+            await self.checker.warm_up(session)
+
+    def launch_browser_trader(self):
+        with self.phase('browser'):
+            from pitrader import PiTrader
+            trader = PiTrader(self.market_num, launch = False, **self.trader_kwargs)
+            trader.start_browser()
+        with self.phase('login'):
+            trader.login(self.email, self.password)
+        return trader
+
+    def launch_http_trader(self):
+        with self.phase('login'):
+            from httptrader import HttpTrader
+            return HttpTrader(self.market_num, self.email, self.password, market = self.market, **self.trader_kwargs)
+
+    async def start_trader(self, session):
+        loop = asyncio.get_running_loop()
+        if self.trader_kind == 'browser':
+            #The browser does not need the market, so it starts right away
+            self.trader = await loop.run_in_executor(None, self.launch_browser_trader)
+        elif self.trader_kind == 'http':
+            while not self.market.is_loaded:
+                await asyncio.sleep(0.01)
+            self.trader = await loop.run_in_executor(None, self.launch_http_trader)
+
+    async def run(self, session):
+        '''
+        Desc:
+            Runs every phase concurrently. Returns once the bots can start
+            checking and the trader is logged in.
+
+        Params:
+            session (aiohttp ClientSession): Session the bots will check
+                with, see PollChecker.make_session().
+
+        '''
+        self.started = time.perf_counter()
+        with self.phase('total'):
+            await asyncio.gather(self.start_checking(session), self.start_trader(session))
+
+    def describe(self):
+        '''
+        Desc:
+            Per-phase timing breakdown, in start order.
+
+        '''
+        lines = []
+        for name, (start, end) in sorted(self.phases.items(), key = lambda item: item[1]):
+            lines.append(f'{name:<8} start: {start * 1e3:8.1f} ms\t duration: {(end - start) * 1e3:8.1f} ms')
+        if 'warm_up' in self.phases:
+            lines.append(f'Time to first check: {self.phases["warm_up"][1] * 1e3:.1f} ms')
+        return '\n'.join(lines)
+
+    async def close(self):
+        await self.market.stop()
+        if self.trader is not None:
+            self.trader.close()
+
+
+async def main(args):
+    trader = None if args.no_trader else ('http' if args.http else 'browser')
+    trader_kwargs = {'session_path': args.session} if (trader == 'browser') and args.session else None
+    startup = Startup(args.market_num, num_bots = args.bots, trader = trader, trader_kwargs = trader_kwargs,
+                      checker_kwargs = {'pool_size': args.pool_size})
+    async with PollChecker.make_session() as session:
+        try:
+            await startup.run(session)
+            print(startup.describe())
+        finally:
+            await startup.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Starts a trading session and reports the startup timing.')
+    parser.add_argument('market_num', type = int)
+    parser.add_argument('--http', action = 'store_true', help = 'Trade with HttpTrader instead of the browser.')
+    parser.add_argument('--no-trader', action = 'store_true', help = 'Only start checking.')
+    parser.add_argument('--bots', type = int, default = 4)
+    parser.add_argument('--pool-size', type = int, default = None)
+    parser.add_argument('--session', default = None, help = 'Encrypted browser session file to reuse across restarts.')
+    asyncio.run(main(parser.parse_args()))
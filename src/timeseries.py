@@ -0,0 +1,222 @@
+import os
+import time
+import numpy as np
+
+
+OBSERVATION = np.dtype([
+    ('timestamp', '<f8'), #time.time() when the value was received
+    ('value', '<f8'), #FTE estimate or RCP spread
+    ('leader', 'S12'), #RCP leader, empty for FTE
+    ('bracket', '<i2'),
+    ('latency', '<f4'), #Seconds the request took
+    ('bot_id', '<u2'),
+])
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('capacity', '<u8'),
+    ('count', '<u8'), #Observations ever appended
+    ('pollster', 'S8'),
+])
+HEADER_SIZE = 64 #Observations start here, leaving room for the header to grow
+MAGIC = b'PIOBS1'
+
+
+class ObservationStore:
+    '''
+    Fixed-size ring buffer of poll observations in a NumPy structured array,
+    optionally backed by a memory-mapped file so the history survives
+    restarts. The oldest observations are overwritten once the buffer is
+    full, so memory stays flat however long the checker runs. Queries work
+    on views of the buffer rather than copies.
+
+    Typical usage: init() -> append() (from PollChecker) -> history() / latency_percentiles() / update_intervals()
+
+    '''
+    def __init__(self, capacity = 1000000, path = None, pollster = ''):
+        '''
+        Desc:
+            Allocates the buffer, or opens the file at path. An existing
+            file keeps its observations. Throws ValueError if an existing
+            file is not an observation store or was made with another
+            capacity.
+
+        Params:
+            capacity (int): Observations kept. About 40 bytes each.
+            path (str): File to memory-map. The buffer lives in memory only
+                if None.
+            pollster (str): 'rcp' or 'fte', stored in the file header.
+
+        '''
+        self.path = path
+        if path is None:
+            self.header = np.zeros(1, dtype = HEADER)
+            self.records = np.zeros(capacity, dtype = OBSERVATION)
+        elif os.path.exists(path) and (os.path.getsize(path) > 0):
+            self.header = np.memmap(path, dtype = HEADER, mode = 'r+', shape = (1,))
+            if self.header['magic'][0] != MAGIC:
+                raise ValueError(f'{path} is not an observation store.')
+            if int(self.header['capacity'][0]) != capacity:
+                raise ValueError(f'{path} holds {int(self.header["capacity"][0])} observations, not {capacity}.')
+            self.records = np.memmap(path, dtype = OBSERVATION, mode = 'r+', offset = HEADER_SIZE,
+                                     shape = (capacity,))
+        else:
+            with open(path, 'wb') as f:
+                f.truncate(HEADER_SIZE + capacity * OBSERVATION.itemsize)
+            self.header = np.memmap(path, dtype = HEADER, mode = 'r+', shape = (1,))
+            self.records = np.memmap(path, dtype = OBSERVATION, mode = 'r+', offset = HEADER_SIZE,
+                                     shape = (capacity,))
+        if self.header['magic'][0] != MAGIC:
+            self.header['magic'] = MAGIC
+            self.header['capacity'] = capacity
+            self.header['pollster'] = pollster.encode('ascii')
+        self.capacity = capacity
+        self.count = int(self.header['count'][0])
+
+    @property
+    def pollster(self):
+        return self.header['pollster'][0].decode('ascii')
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, value, bracket, latency, bot_id = 0, timestamp = None):
+        '''
+        Desc:
+            Stores one observation, overwriting the oldest if full.
+
+        Params:
+            value (multiple types): FTE estimate or RCP (leader, spread).
+            bracket (int): Bracket the value classifies into, -1 if none.
+            latency (float): Seconds the request took.
+            bot_id (int): The ID of the poll checking bot.
+            timestamp (float): time.time() of the observation. Now if None.
+
+        '''
+        if timestamp is None:
+            timestamp = time.time()
+        leader = b''
+        if isinstance(value, tuple):
+            leader = value[0].encode('ascii', errors = 'ignore')
+            value = value[1]
+        if bracket is None:
+            bracket = -1
+        self.records[self.count % self.capacity] = (timestamp, value, leader, bracket, latency, bot_id or 0)
+        self.count += 1
+        self.header['count'] = self.count
+
+    def segments(self, since = None):
+        '''
+        Desc:
+            The stored observations in time order as at most two views of
+            the buffer, the older part first. Nothing is copied.
+
+        Params:
+            since (float): Only observations from this time.time() on.
+
+        Returns:
+            segments (list of structured numpy arrays)
+
+        '''
+        if self.count <= self.capacity:
+            segments = [self.records[:self.count]]
+        else:
+            head = self.count % self.capacity
+            segments = [self.records[head:], self.records[:head]]
+        if since is not None:
+            segments = [seg[np.searchsorted(seg['timestamp'], since):] for seg in segments]
+        return [seg for seg in segments if len(seg)]
+
+    def valid(self):
+        '''
+        Desc:
+            Every stored observation in storage order, a single view. For
+            queries where order does not matter.
+
+        '''
+        return self.records[:len(self)]
+
+    def history(self, since = None):
+        '''
+        Desc:
+            Stored observations in time order. A view of the buffer unless
+            the requested range wraps around its end, which is copied.
+
+        Params:
+            since (float): Only observations from this time.time() on.
+
+        Returns:
+            observations (structured numpy array): Fields as in OBSERVATION.
+
+        '''
+        segments = self.segments(since)
+        if not segments:
+            return self.records[:0]
+        if len(segments) == 1:
+            return segments[0]
+        return np.concatenate(segments)
+
+    def latency_percentiles(self, percents = (50, 90, 99), since = None):
+        '''
+        Returns:
+            percentiles (numpy array): Request latency in seconds at each
+                percent, NaN if there are no observations.
+
+        '''
+        if since is None:
+            latencies = self.valid()['latency']
+        else:
+            latencies = np.concatenate([seg['latency'] for seg in self.segments(since)] or [np.empty(0)])
+        if len(latencies) == 0:
+            return np.full(len(percents), np.nan)
+        return np.percentile(latencies, percents)
+
+    def update_times(self, since = None):
+        '''
+        Desc:
+            When the poll source published a new value, as the times of the
+            first observations of each new value. Observations are stored
+            as requests complete, so a slow request that started before an
+            update can land after a fast one that already saw it. They are
+            put in the order their requests started, which keeps such a
+            late old value from counting as two more updates. Observations
+            without a value (stored as NaN) are left out.
+
+        Returns:
+            timestamps (numpy array)
+
+        '''
+        observations = self.history(since)
+        observations = observations[~np.isnan(observations['value'])]
+        if len(observations) < 2:
+            return np.empty(0)
+        observations = observations[np.argsort(observations['timestamp'] - observations['latency'], kind = 'stable')]
+        changed = (observations['value'][1:] != observations['value'][:-1]) | \
+                  (observations['leader'][1:] != observations['leader'][:-1])
+        return observations['timestamp'][1:][changed]
+
+    def update_intervals(self, since = None):
+        '''
+        Desc:
+            The source's update cadence, seconds between consecutive updates.
+
+        '''
+        return np.diff(self.update_times(since))
+
+    def flush(self):
+        if isinstance(self.records, np.memmap):
+            self.records.flush()
+            self.header.flush()
+
+    def close(self):
+        self.flush()
+        self.records = None
+        self.header = None
+
+    def describe(self):
+        percentiles = self.latency_percentiles()
+        updates = self.update_times()
+        intervals = np.diff(updates)
+        cadence = round(float(np.median(intervals)), 1) if len(intervals) else None
+        return (f'Observations: {len(self)}/{self.capacity}\t Updates: {len(updates)}\t '
+                f'Median update interval: {cadence} s\t '
+                f'Latency p50/p90/p99: {", ".join(f"{p * 1e3:.1f}" for p in percentiles)} ms')
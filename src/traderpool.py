@@ -0,0 +1,240 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import maintenance
+
+
+#is_sent means the order was submitted without an error, not that it filled.
+#PiTrader only clicks the button and gets no confirmation back.
+OrderResult = namedtuple('OrderResult', ['order', 'is_sent', 'response', 'error', 'started', 'finished'])
+
+
+class TraderPool:
+    '''
+    Several logged-in trader sessions that place a batch of orders at once,
+    one order per session, so a multi-leg reaction takes about as long as
+    its slowest order. Sessions that die are replaced in the background.
+
+    Typical usage: init() -> start() -> execute_batch(orders) -> close()
+
+    '''
+    def __init__(self, market_num, size = 2, email = None, password = None, trader = 'browser', market = None,
+                 trader_kwargs = None, retry_interval = 30.0, idle_timeout = 60.0, metrics = None):
+        '''
+        Desc:
+            Prompts for missing credentials. No session is opened until
+            start().
+
+        Params:
+            market_num (int): PredictIt number assigned to specific market.
+            size (int): Number of sessions, the most orders run at once.
+            email (str): PredictIt login.
+            password (str): PredictIt password.
+            trader (str): 'browser' for PiTrader or 'http' for HttpTrader.
+            market (MarketData): Market data shared by HttpTrader sessions.
+            trader_kwargs (dict): Extra arguments for every trader.
+            retry_interval (float): Seconds between attempts to replace a
+                session, e.g. while PredictIt is under maintenance.
+            idle_timeout (float): Seconds an order waits for a free session
+                before it fails.
+            metrics (Metrics): If given, detection-to-order latencies are
+                recorded into it.
+
+        '''
+        assert trader in ('browser', 'http'), 'Trader must be browser or http.'
+        assert size > 0, 'Pool needs at least one session.'
+        if email is None:
+            email = input("Enter your PredictIt login: ")
+        if password is None:
+            password = input("Enter your PredictIt password: ")
+        self.market_num = market_num
+        self.size = size
+        self.email = email
+        self.password = password
+        self.trader_kind = trader
+        self.market = market
+        self.trader_kwargs = dict(trader_kwargs or {})
+        self.retry_interval = retry_interval
+        self.idle_timeout = idle_timeout
+        self.metrics = metrics
+        self.idle = queue.Queue() #Logged-in traders ready for an order
+        self.traders = []
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers = size) #Orders, one per session
+        #Sessions are opened on their own threads, so orders waiting for a
+        #free session never hold up the replacement of a dead one
+        self.opener = ThreadPoolExecutor(max_workers = size)
+        self.replaced = 0
+
+    def new_trader(self):
+        if self.trader_kind == 'http':
+            from httptrader import HttpTrader
+            return HttpTrader(self.market_num, self.email, self.password, market = self.market, **self.trader_kwargs)
+        from pitrader import PiTrader
+        return PiTrader(self.market_num, self.email, self.password, **self.trader_kwargs)
+
+    def add_trader(self):
+        '''
+        Desc:
+            Opens and logs in a session, retrying every retry_interval
+            seconds until it works or the pool is closed.
+
+        '''
+        while not self.closed.is_set():
+            try:
+                maintenance.raise_for_under_maintenance()
+                trader = self.new_trader()
+            except Exception as e:
+                print(f'Could not open a trader session: {repr(e)}')
+                self.closed.wait(self.retry_interval)
+                continue
+            if self.closed.is_set():
+                trader.close()
+                return None
+            with self.lock:
+                self.traders.append(trader)
+            self.idle.put(trader)
+            return trader
+        return None
+
+    def start(self):
+        '''
+        Desc:
+            Opens every session concurrently and waits until at least one
+            is logged in.
+
+        '''
+        for i in range(self.size):
+            self.opener.submit(self.add_trader)
+        self.idle.put(self.take_idle())
+
+    def replace(self, trader):
+        with self.lock:
+            if trader in self.traders:
+                self.traders.remove(trader)
+        try:
+            trader.close()
+        except Exception:
+            pass
+        self.replaced += 1
+        if not self.closed.is_set():
+            self.opener.submit(self.add_trader)
+
+    def take_idle(self):
+        '''
+        Desc:
+            Waits for a free live session. Sessions found dead are replaced
+            and skipped. Throws exception if none frees up within
+            idle_timeout or the pool is closed meanwhile.
+
+        '''
+        deadline = time.time() + self.idle_timeout
+        while not self.closed.is_set():
+            try:
+                trader = self.idle.get(timeout = min(0.1, max(0.0, deadline - time.time())))
+            except queue.Empty:
+                if time.time() >= deadline:
+                    raise Exception('No trader session became free in time.')
+                continue
+            if trader.is_alive():
+                return trader
+            print('Trader session died, replacing it.')
+            self.replace(trader)
+        raise Exception('Trader pool is closed.')
+
+    def execute(self, order, detected_at = None):
+        '''
+        Desc:
+            Places one order on the next idle session. An order that fails
+            because its session died is placed once more on the next one,
+            e.g. the replacement, so a multi-leg reaction keeps its legs.
+            Runs on a pool thread.
+
+        Params:
+            order (Order): See decisiontable.Order.
+            detected_at (float): time.time() of the change detection.
+
+        Returns:
+            result (OrderResult)
+
+        '''
+        result, session_died = self.place(order, detected_at)
+        if session_died:
+            retried, session_died = self.place(order, detected_at)
+            result = retried._replace(started = result.started)
+        return result
+
+    def place(self, order, detected_at = None):
+        '''
+        Returns:
+            result (OrderResult), session_died (bool): Whether the order
+                failed with its session.
+
+        '''
+        started = time.time()
+        try:
+            trader = self.take_idle()
+        except Exception as e:
+            return OrderResult(order, False, None, e, started, time.time()), False
+        started = time.time()
+        try:
+            trader.prepare_a_purchase(*order)
+            response = trader.execute_order()
+        except Exception as e:
+            finished = time.time()
+            if trader.is_alive():
+                self.idle.put(trader)
+                return OrderResult(order, False, None, e, started, finished), False
+            print('Trader session died, replacing it.')
+            self.replace(trader)
+            return OrderResult(order, False, None, e, started, finished), True
+        finished = time.time()
+        self.idle.put(trader)
+        if (detected_at is not None) and (self.metrics is not None):
+            self.metrics.record('detection_to_order', finished - detected_at)
+        return OrderResult(order, True, response, None, started, finished), False
+
+    def execute_batch(self, orders, detected_at = None):
+        '''
+        Desc:
+            Places every order concurrently, one per session. Orders beyond
+            the number of idle sessions wait for the first free one.
+            Throws exception if PredictIt is under maintenance.
+
+        Params:
+            orders (iterable of Orders): E.g. DecisionTable.lookup().
+            detected_at (float): time.time() of the change detection.
+
+        Returns:
+            results (list of OrderResults): In the order of orders.
+
+        '''
+        maintenance.raise_for_under_maintenance()
+        futures = [self.executor.submit(self.execute, order, detected_at) for order in orders]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.closed.set()
+        self.executor.shutdown(wait = False, cancel_futures = True)
+        self.opener.shutdown(wait = False, cancel_futures = True)
+        with self.lock:
+            traders = list(self.traders)
+            self.traders = []
+        for trader in traders:
+            try:
+                trader.close()
+            except Exception:
+                pass
+
+    def describe(self, results):
+        lines = []
+        for result in results:
+            status = 'SENT' if result.is_sent else f'FAILED ({repr(result.error)})'
+            lines.append(f'{result.order}\t {status}\t {(result.finished - result.started) * 1e3:.1f} ms')
+        if results:
+            span = max(r.finished for r in results) - min(r.started for r in results)
+            lines.append(f'Batch: {span * 1e3:.1f} ms\t Sessions: {len(self.traders)}\t Replaced: {self.replaced}')
+        return '\n'.join(lines)
@@ -0,0 +1,127 @@
+import hashlib
+
+
+class CachedResponse:
+    '''
+    Validators and parsed value of the last response seen for one URL.
+
+    '''
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+        self.value = None
+
+
+class ValidatorCache:
+    '''
+    Response-validator cache shared by all bots of a PollChecker. Tracks
+    ETag / Last-Modified so requests can be made conditional, and falls back
+    to a hash of the raw bytes for servers that ignore conditional headers.
+    Either kind of hit returns the previously parsed value, so decoding and
+    parsing are skipped and the bots see an unchanged value.
+
+    Typical usage: request_headers() -> (make the request) -> not_modified() or
+                   lookup() -> (parse on a miss) -> store()
+
+    '''
+    DIGEST_SIZE = 16
+
+    def __init__(self):
+        self.entries = {}
+        self.not_modified_hits = 0
+        self.hash_hits = 0
+        self.misses = 0
+
+    @property
+    def hits(self):
+        return self.not_modified_hits + self.hash_hits
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def digest(self, raw):
+        return hashlib.blake2b(raw, digest_size = self.DIGEST_SIZE).digest()
+
+    def request_headers(self, url):
+        '''
+        Desc:
+            Conditional request headers for the url. Empty until a parsed
+            value has been stored, so a 304 always has a value to fall back on.
+
+        Returns:
+            headers (dict): If-None-Match and/or If-Modified-Since.
+
+        '''
+        entry = self.entries.get(url)
+        headers = {}
+        if (entry is None) or (entry.value is None):
+            return headers
+        if entry.etag is not None:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified is not None:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self, url):
+        '''
+        Desc:
+            Records a 304 response and returns the cached value.
+
+        '''
+        self.not_modified_hits += 1
+        return self.entries[url].value
+
+    def lookup(self, url, raw):
+        '''
+        Desc:
+            Compares the raw response bytes against the hash of the last
+            parsed response.
+
+        Params:
+            url (str): Requested url.
+            raw (bytes): Raw response body.
+
+        Returns:
+            is_hit (bool): True if the body is unchanged.
+            value (multiple types): Cached parsed value on a hit, else None.
+
+        '''
+        entry = self.entries.get(url)
+        if (entry is not None) and (entry.digest is not None) and (entry.digest == self.digest(raw)):
+            self.hash_hits += 1
+            return True, entry.value
+        self.misses += 1
+        return False, None
+
+    def miss(self):
+        self.misses += 1
+
+    def store(self, url, value, headers, raw = None):
+        '''
+        Desc:
+            Saves the parsed value along with the response validators.
+
+        Params:
+            url (str): Requested url.
+            value (multiple types): Parsed poll value.
+            headers (mapping): Response headers.
+            raw (bytes): Raw response body to hash. If None, no hash is kept.
+
+        '''
+        entry = self.entries.get(url)
+        if entry is None:
+            entry = CachedResponse()
+            self.entries[url] = entry
+        entry.etag = headers.get('ETag')
+        entry.last_modified = headers.get('Last-Modified')
+        entry.digest = None if raw is None else self.digest(raw)
+        entry.value = value
+
+    def describe(self):
+        return (f'Cache hits: {self.hits} (304: {self.not_modified_hits}, hash: {self.hash_hits})\t '
+                f'Misses: {self.misses}\t Hit ratio: {round(self.hit_ratio, 3)}')